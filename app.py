@@ -2,14 +2,25 @@ import os
 import streamlit as st
 import pandas as pd
 from stages.stage_1 import scout_leads
-from stages.stage_2 import get_linkedin_profile_details
-from stages.stage_3 import evaluate_lead
+from stages.stage_2 import get_linkedin_profile_details, ScrapeCheckpoint
+from stages.stage_3 import get_lead_evaluator
 from stages.stage_message import message_lead
+from stages.llm_executor import run_per_key
+from stages.llm_cache import get_llm_cache
+from stages.llm_usage import UsageTracker
+from stages.db_writes import save_scored_leads, save_messages, BatchWriter
+from stages.browser_pool import get_browser_pool
+from stages.page_weight import BLOCK_PROFILES, get_page_weight_stats
+from stages.pacing import pacing_stats, DEFAULT_TARGET_PER_HOUR, DEFAULT_DAILY_CAP
+from stages.work_queue import SupabaseLeaseQueue, LeasedUrls, SharedUrlPool, make_worker_id
 # from stages.stage_enrich import enrich_contact
 import io
 from supabase import create_client, Client
 from dotenv import load_dotenv
 import concurrent.futures
+import functools
+import time
+import copy
 
 
 
@@ -19,26 +30,84 @@ url: str = os.getenv("SUPABASE_URL")
 key: str = os.getenv("SUPABASE_KEY")
 supabase: Client = create_client(url, key)
 
-# Fetch all linkedin accounts from Supabase
+# Every widget interaction reruns this script; count the Supabase queries each rerun actually makes
+st.session_state["supabase_calls"] = 0
 
-def fetch_lkd_account(status):
-    accounts = {}
-    all_status = set()
+
+def count_supabase_call():
+    st.session_state["supabase_calls"] = st.session_state.get("supabase_calls", 0) + 1
+
+
+# Reference data changes rarely: cache it across reruns and sessions, refresh from the sidebar
+ACCOUNTS_TTL = 300
+TAGS_TTL = 600
+# Work lists change when a tab writes results; cache briefly and clear after writes
+LEADS_TTL = 60
+
+
+def session_cache(ttl):
+    """
+    Like st.cache_data, but per browser session. Work lists are what an operator is
+    about to process, so one operator's cached list must never be handed to another.
+    """
+    def decorator(fn):
+        state_key = f"_session_cache_{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            entries = st.session_state.setdefault(state_key, {})
+            arg_key = repr((args, sorted(kwargs.items())))
+            now = time.monotonic()
+            if arg_key not in entries or now - entries[arg_key][0] >= ttl:
+                entries[arg_key] = (now, fn(*args, **kwargs))
+            # Callers get their own copy, as with st.cache_data
+            return copy.deepcopy(entries[arg_key][1])
+
+        wrapper.clear = lambda: st.session_state.pop(state_key, None)
+        return wrapper
+    return decorator
+
+
+# Fetch all linkedin accounts from Supabase (one query shared by every tab and scraper expander)
+@st.cache_data(ttl=ACCOUNTS_TTL, show_spinner=False)
+def fetch_all_accounts():
+    count_supabase_call()
     response = (
         supabase.table("Accounts")
         .select("email_id", "password", "status")
-        .eq("status", status)
         .execute()
-)
-    for item in response.data:
-        accounts[item['email_id']] = item['password']
-        all_status.add(item['status'])
+    )
+    return response.data or []
+
+
+def fetch_account_statuses():
+    return list(dict.fromkeys(item['status'] for item in fetch_all_accounts()))
+
+
+def fetch_lkd_account(status):
+    accounts = {}
+    for item in fetch_all_accounts():
+        if item['status'] == status:
+            accounts[item['email_id']] = item['password']
     return accounts
 
 
+@st.cache_data(ttl=TAGS_TTL, show_spinner=False)
+def fetch_unique_tags():
+    count_supabase_call()
+    response = supabase.table("unique_tags").select("*").execute()
+    return [item['tag'] for item in (response.data or []) if item['tag']]
+
+
+def invalidate_reference_data():
+    fetch_all_accounts.clear()
+    fetch_unique_tags.clear()
+
 
 # Load Linkedin urls from all_leads table for Stage 2 from Supabase
+@session_cache(ttl=LEADS_TTL)
 def fetch_urls_from_all_leads(init_range, final_range, tags):
+    count_supabase_call()
     linkedin_urls = [] 
     response = (
                 supabase.table("all_leads")
@@ -54,7 +123,9 @@ def fetch_urls_from_all_leads(init_range, final_range, tags):
 
 
 # Load LinkedIn profile details from lead_details table for Stage 3 from Supabase
+@session_cache(ttl=LEADS_TTL)
 def fetch_leads_from_lead_details(limit):
+    count_supabase_call()
     lead_details_list = [] 
     response = (
         supabase.table("lead_details")
@@ -68,8 +139,64 @@ def fetch_leads_from_lead_details(limit):
         lead_details_list.append(item)
     return lead_details_list
 
+# Load leads whose message is not generated yet for Stage 5 from Supabase
+@session_cache(ttl=LEADS_TTL)
+def fetch_leads_for_message_generate(limit: int):
+    count_supabase_call()
+    # 1. Fetch lead_ids from llm_response where message_generated = 'no'
+    llm_responses_res = (
+        supabase.table("llm_response")
+        .select("lead_id")
+        .eq("message_generated", "no")
+        .execute()
+    )
+    llm_resp_lead_ids = [resp["lead_id"] for resp in (llm_responses_res.data or [])]
+
+    if not llm_resp_lead_ids:
+        return []
+
+    # 2. Fetch matching leads in one query
+    count_supabase_call()
+    leads_res = (
+        supabase.table("lead_details")
+        .select("*")
+        .in_("lead_id", llm_resp_lead_ids)
+        .limit(limit)
+        .execute()
+    )
+
+    return leads_res.data or []
+
+
+def invalidate_lead_lists():
+    """Clear this session's cached work lists after a tab wrote results, so the next rerun sees fresh rows"""
+    fetch_urls_from_all_leads.clear()
+    fetch_leads_from_lead_details.clear()
+    fetch_leads_for_message_generate.clear()
+
+
 st.title("Dreamforce Scout App")
 
+with st.sidebar:
+    st.subheader("Reference data")
+    if st.button("Refresh accounts & tags", help="Accounts, statuses and tags are cached for a few minutes. Use this after editing them in Supabase."):
+        invalidate_reference_data()
+    supabase_calls_placeholder = st.empty()
+
+    st.subheader("Browsers")
+    browser_pool = get_browser_pool()
+    browser_pool.headless = st.checkbox("Run Chrome headless", value=browser_pool.headless, key="browser_headless",
+                                        help="Applies to browsers launched from now on; warm browsers keep their mode.")
+    browser_pool.block_profile = st.selectbox(
+        "Block page resources", list(BLOCK_PROFILES), index=list(BLOCK_PROFILES).index(browser_pool.block_profile),
+        key="browser_block_profile",
+        help="light: video, fonts and trackers. aggressive: also images. Applies to warm browsers on their next run.")
+    if st.button("Close idle browsers", help="Logged-in browsers stay open between runs so the next run skips launch and login."):
+        browser_pool.shutdown()
+    browser_metrics = browser_pool.metrics()
+    st.caption(f"{browser_metrics['idle']} warm · {browser_metrics['launches']} launched · {browser_metrics['reuses']} reused "
+               f"(~{browser_metrics['startup_seconds_saved']:.0f}s startup saved) · {browser_metrics['recycled']} recycled")
+
 tab1, tab2, tab3, tab4, tab5 = st.tabs(["Scout Leads", "Scrape Details", "Find Relevant Leads", "Enrich Contacts", "Generate Personalised Messages"])
 
 with tab1:
@@ -91,20 +218,16 @@ with tab1:
         search_url = st.text_input("Enter the search url:", help="Eg. https://www.linkedin.com/search/results/all/?keywords=%23dreamforce2025&origin=HISTORY&sid=AGZ")
         keywords = ""
 
-    time_to_load = st.number_input("Time until scoll to load more posts (in sec):", min_value=1, max_value=1000, value=30)
+    time_to_load = st.number_input("Time until scoll to load more posts (in sec):", min_value=1, max_value=1000, value=30,
+                                   help="Upper bound; scrolling also stops once the results run out or the target is reached.")
+    target_posts = st.number_input("Posts to harvest (0 = until the results run out):", min_value=0, max_value=1000, value=0)
+    skip_known = st.checkbox("Skip posts and leads collected by earlier runs", value=True,
+                             help="Uses the local dedupe index in .cache: known posts are only reopened when their reaction "
+                                  "count grew, and only their new reactors are read. Untick to re-harvest everything.")
     
     # Select LinkedIn account from the dropdown
     st.header("Select Linkedin Account:")
-    all_status_s1 = set()
-    response = (
-    supabase.table("Accounts")
-    .select("email_id", "password", "status")
-    .execute()
-)
-    for leads in response.data:
-        all_status_s1.add(leads['status'])
-
-    status_input_s1 = st.selectbox("Fetch linkedin accounts by status", list(all_status_s1))
+    status_input_s1 = st.selectbox("Fetch linkedin accounts by status", fetch_account_statuses())
     accounts_s1 = fetch_lkd_account(status_input_s1)
 
     selected_username = st.selectbox("Select your LinkedIn username:", list(accounts_s1.keys()))
@@ -118,7 +241,19 @@ with tab1:
         )
 
     if st.button("Execute Scout Leads"):
-        results = scout_leads(time_to_load=time_to_load, username=selected_username, password=password, search_url=search_url, keywords=keywords.split(','), )
+        ingest_stats = {}
+        results = scout_leads(time_to_load=time_to_load, username=selected_username, password=password, search_url=search_url, keywords=keywords.split(','), stats_callback=ingest_stats.update, target_posts=target_posts or None, skip_known=skip_known)
+        invalidate_lead_lists()
+        if ingest_stats:
+            col_new, col_known, col_failed = st.columns(3)
+            col_new.metric("New leads saved", ingest_stats["inserted"])
+            col_known.metric("Already known", ingest_stats["already_known"])
+            col_failed.metric("Failed", ingest_stats["failed"])
+            st.caption(f"{ingest_stats['collected']} reactors collected, {ingest_stats['unique']} unique, written in {ingest_stats['requests']} request(s). "
+                       f"Skipped {ingest_stats['skipped_known_posts']} unchanged posts and {ingest_stats['skipped_known_leads']} reactors known from earlier runs; "
+                       f"revisited {ingest_stats['revisited_posts']} posts with new reactions.")
+            for err in ingest_stats["errors"]:
+                st.error(f"Saving chunk {err['chunk']} of all_leads failed ({len(err['ids'])} leads): {err['error']}")
         # Ensure the CSV has a header named "LinkedIn URLs"
         if isinstance(results, list) and results and isinstance(results[0], dict):
             results_df = pd.DataFrame(results)
@@ -142,11 +277,7 @@ with tab2:
 
     no_of_accounts = st.number_input("Number of LinkedIn accounts to use:", min_value=1, max_value=10, value=1, step=1, format="%d", key="no_of_accounts")
     
-    tag_tab2_list = supabase.table("unique_tags").select("*").execute()
-    
-    tag_tab2 = st.multiselect("Filter leads by tag (optional):", [item['tag'] for item in tag_tab2_list.data if item['tag']], help="Select one or more tags to filter leads. Leave empty to fetch all tags.")
-    
-    urls_per_account = [[] for _ in range(no_of_accounts)]  # Will hold URLs for each account
+    tag_tab2 = st.multiselect("Filter leads by tag (optional):", fetch_unique_tags(), help="Select one or more tags to filter leads. Leave empty to fetch all tags.")
 
     if data_source == "Use LinkedIn URLs from Supabase":
         st.header("1. Load URLs from Database")
@@ -156,6 +287,8 @@ with tab2:
         fin_range = num_leads + init_range - 1
 
         all_linkedin_urls = fetch_urls_from_all_leads(init_range=init_range, final_range=fin_range, tags=tag_tab2 if tag_tab2 else ['dreamforce post'])
+        # Re-queried on every run (scraped leads drop out), so the checkpoint is keyed on the query
+        url_source = "all_leads:" + ",".join(sorted(tag_tab2 if tag_tab2 else ['dreamforce post']))
         if all_linkedin_urls:
             st.success(f"Found {len(all_linkedin_urls)} LinkedIn URLs in Supabase (scraped=False)")
             st.write("Sample URLs:")
@@ -165,7 +298,15 @@ with tab2:
                 st.write(f"... and {len(all_linkedin_urls) - no_of_accounts} more")
         else:
             st.warning("No LinkedIn URLs found in Supabase with scraped=False")
+        use_leases = st.checkbox(
+            "Claim URLs with leases (safe when several people or tabs scrape at once)",
+            value=False, key="tab2_use_leases",
+            help="Each scraper claims a few unscraped leads at a time from all_leads, so no two scrapers ever get "
+                 "the same URL. Needs sql/scrape_leases.sql to be applied in Supabase."
+        )
     else:
+        use_leases = False
+        url_source = None
         st.write("Upload a CSV with a column containing LinkedIn profile URLs.")
         uploaded_file = st.file_uploader("Upload CSV with LinkedIn URLs", type=["csv"])
         if uploaded_file is not None:
@@ -210,16 +351,8 @@ with tab2:
 
     for i in range(no_of_accounts):
         with st.expander(f"Scraper #{i+1} Account Settings", expanded=(i == 0)):
-            # Fetch all statuses for dropdown
-            all_status_s2 = set()
-            response = (
-                supabase.table("Accounts")
-                .select("email_id", "password", "status")
-                .execute()
-            )
-            for leads in response.data:
-                all_status_s2.add(leads['status'])
-            status_list = list(all_status_s2)
+            # Statuses for dropdown (cached accounts query shared by all expanders)
+            status_list = fetch_account_statuses()
 
             status_input = st.selectbox(
                 f"Filter LinkedIn accounts by status for Scraper #{i+1}",
@@ -248,62 +381,128 @@ with tab2:
 
     st.markdown("**Tip:** You can assign different statuses and accounts to each scraper. If 'Require unique accounts' is checked, you can't select the same account twice.")
 
-    # --- URL splitting logic ---
+    # --- URL assignment ---
     st.header("3. Assign URLs to each account")
-    st.markdown("URLs will be split evenly among the selected accounts. Each account will scrape a unique set of leads.")
+    st.markdown("Scrapers pull URLs from a shared queue a few at a time, so faster accounts take on more work. "
+                "If an account stops (login failure, crash, repeated errors), its unfinished URLs go back to the queue for the others.")
+    chunk_size = st.number_input("URLs pulled per chunk:", min_value=1, max_value=20, value=3, step=1, key="tab2_chunk_size")
+    col_rate, col_cap = st.columns(2)
+    with col_rate:
+        target_per_hour = st.number_input("Target profiles per hour per account:", min_value=1, max_value=600,
+                                          value=int(DEFAULT_TARGET_PER_HOUR), step=10, key="tab2_target_per_hour",
+                                          help="Accounts slow down automatically on checkpoints, empty profiles or "
+                                               "error bursts, and recover toward this rate while healthy.")
+    with col_cap:
+        daily_cap = st.number_input("Daily cap per account:", min_value=1, max_value=5000,
+                                    value=DEFAULT_DAILY_CAP, step=50, key="tab2_daily_cap")
+    parse_offline = st.checkbox(
+        "Snapshot pages and parse them offline", value=False, key="tab2_parse_offline",
+        help="The browser only saves each profile's page source (gzipped, in .cache/snapshots); fields are parsed "
+             "with lxml in separate processes. If selectors break, re-parse with reparse_snapshots.py instead of scraping again."
+    )
 
-    if all_linkedin_urls:
-        # Split URLs as evenly as possible among accounts
+    if use_leases:
+        if num_leads:
+            st.info(f"Each scraper will claim up to {-(-num_leads // max(1, no_of_accounts))} URLs from all_leads while it runs.")
+        else:
+            st.info("Each scraper will claim unscraped leads from all_leads until none are left.")
+    elif all_linkedin_urls:
         num_accounts = len([u for u in selected_usernames if u])
         if num_accounts == 0:
             st.warning("Please select at least one LinkedIn account before assigning URLs.")
         else:
-            for idx, url in enumerate(all_linkedin_urls):
-                urls_per_account[idx % num_accounts].append(url)
-            for i, username in enumerate(selected_usernames):
-                st.write(f"**Scraper #{i+1} ({username})** will process {len(urls_per_account[i])} URLs.")
-                if len(urls_per_account[i]) > 0:
-                    st.code("\n".join(urls_per_account[i][:3]) + ("\n..." if len(urls_per_account[i]) > 3 else ""), language="text")
+            st.write(f"**{len(all_linkedin_urls)} URLs** will be shared by {num_accounts} scrapers.")
     else:
         st.info("No URLs loaded yet.")
 
     if st.button(f"🚀 Start Scraping with {no_of_accounts} Accounts"):
-        if not all_linkedin_urls:
+        # With leases the scrapers claim straight from all_leads; the loaded list is only a preview
+        if not use_leases and not all_linkedin_urls:
             st.error("No LinkedIn URLs loaded. Please load URLs from Supabase or upload a CSV.")
         else:
             with st.container():
                 st.info(f"Starting LinkedIn profile scraping with {no_of_accounts} accounts. Please do not close this tab.")
 
                 def run_scraper(idx, username, password, urls):
+                    started = time.monotonic()
                     if not password:
-                        return (idx, username, None, f"Password not found for {username}. Skipping.")
-                    if not urls:
-                        return (idx, username, None, f"No URLs assigned to {username}. Skipping.")
+                        return (idx, username, None, f"Password not found for {username}. Skipping.", 0.0)
                     try:
                         scraped_results = get_linkedin_profile_details(
                             urls,
                             username=username,
-                            password=password
+                            password=password,
+                            profile_callback=urls.on_profile,
+                            parse_offline=parse_offline,
+                            target_per_hour=target_per_hour,
+                            daily_cap=daily_cap
                         )
-                        return (idx, username, scraped_results, None)
+                        return (idx, username, scraped_results, None, time.monotonic() - started)
                     except Exception as e:
-                        return (idx, username, None, f"Error during scraping with {username}: {e}")
+                        return (idx, username, None, f"Error during scraping with {username}: {e}", time.monotonic() - started)
+
+                # One shared queue (or one lease claimer) per scraper; a checkpoint covers the whole URL set
+                url_pool = None
+                if not use_leases:
+                    checkpoint = ScrapeCheckpoint(ScrapeCheckpoint.run_id_for("tab2", url_source or all_linkedin_urls))
+                    url_pool = SharedUrlPool(all_linkedin_urls, chunk_size=chunk_size, checkpoint=checkpoint)
+                    if url_pool.skipped:
+                        st.info(f"⏩ Resuming: {url_pool.skipped} of {len(all_linkedin_urls)} URLs were already processed")
 
-                # Prepare arguments for each scraper
                 scraper_args = []
                 for idx, username in enumerate(selected_usernames):
                     password = accounts_per_status[idx].get(username, None)
-                    urls = urls_per_account[idx]
+                    if use_leases:
+                        lease_queue = SupabaseLeaseQueue(supabase, tags=tag_tab2 if tag_tab2 else ['dreamforce post'])
+                        urls = LeasedUrls(lease_queue, make_worker_id(f"{username}-{idx + 1}"), batch_size=chunk_size,
+                                          max_urls=-(-num_leads // no_of_accounts) if num_leads else None)
+                    else:
+                        urls = url_pool.worker(f"#{idx + 1} {username}")
                     scraper_args.append((idx, username, password, urls))
 
+                browsers_before = get_browser_pool().metrics()
                 results = []
                 with concurrent.futures.ThreadPoolExecutor(max_workers=no_of_accounts) as executor:
                     futures = [executor.submit(run_scraper, *args) for args in scraper_args]
                     for future in concurrent.futures.as_completed(futures):
                         results.append(future.result())
+                invalidate_lead_lists()
+
+                # Per-account throughput
+                st.markdown("### Throughput per account")
+                if url_pool is not None:
+                    st.dataframe(pd.DataFrame(url_pool.stats()), use_container_width=True)
+                    left = url_pool.remaining + len(url_pool.dropped)
+                    if left:
+                        st.warning(f"{left} URLs were not scraped (no healthy account left, or they kept failing). Run again to retry them.")
+                    if checkpoint.finished(all_linkedin_urls):
+                        # Nothing left to resume; URLs that ran out of attempts get a fresh start next run
+                        checkpoint.clear()
+                else:
+                    st.dataframe(pd.DataFrame([{
+                        "account": f"#{idx + 1} {username}",
+                        "scraped": len(scraped_results or []),
+                        "seconds": round(elapsed, 1),
+                        "profiles_per_hour": round(len(scraped_results or []) * 3600 / elapsed, 1) if elapsed else 0.0,
+                    } for idx, username, scraped_results, error, elapsed in sorted(results, key=lambda x: x[0])]),
+                        use_container_width=True)
+
+                browsers_after = get_browser_pool().metrics()
+                st.caption(
+                    f"Browsers this run: {browsers_after['launches'] - browsers_before['launches']} launched, "
+                    f"{browsers_after['reuses'] - browsers_before['reuses']} reused warm "
+                    f"(~{browsers_after['startup_seconds_saved'] - browsers_before['startup_seconds_saved']:.0f}s of startup and login saved), "
+                    f"{browsers_after['recycled'] - browsers_before['recycled']} recycled"
+                )
+
+                st.markdown("### Pacing per account")
+                st.dataframe(pd.DataFrame(pacing_stats()), use_container_width=True)
+
+                st.markdown("### Page weight per block profile")
+                st.dataframe(pd.DataFrame(get_page_weight_stats().summary()), use_container_width=True)
 
                 # Display results
-                for idx, username, scraped_results, error in sorted(results, key=lambda x: x[0]):
+                for idx, username, scraped_results, error, elapsed in sorted(results, key=lambda x: x[0]):
                     st.markdown(f"### Scraper #{idx+1} ({username})")
                     if error:
                         st.error(error)
@@ -340,6 +539,16 @@ with tab3:
             api_key = st.text_input(f"Gemini API Key for Account #{i+1}", type="password", key=f"gemini_api_key_{i}")
             gemini_api_keys.append(api_key)
 
+    col_conc, col_rpm = st.columns(2)
+    with col_conc:
+        max_concurrency_per_key = st.number_input("Parallel requests per Gemini key:", min_value=1, max_value=32, value=4, step=1, key="max_concurrency_per_key")
+    with col_rpm:
+        requests_per_minute = st.number_input("Requests per minute per Gemini key (0 = no limit):", min_value=0, max_value=2000, value=10, step=1, key="requests_per_minute")
+
+    batch_mode = st.checkbox("Score several leads per Gemini call (batch mode)", value=True, key="batch_mode",
+                             help="Sends the scoring instructions once per batch instead of once per lead. Leads missing from a batch answer are retried one by one.")
+    batch_token_budget = st.number_input("Prompt token budget per batch:", min_value=2000, max_value=200000, value=8000, step=1000, key="batch_token_budget", disabled=not batch_mode)
+
     # Distribute leads evenly among accounts
     leads_per_account = [[] for _ in range(num_gemini_accounts)]
     for idx, lead in enumerate(lead_details_list):
@@ -365,57 +574,105 @@ with tab3:
             st.error("No lead details found in Supabase.")
             st.stop()
 
-        with st.spinner("Processing leads in series. Please wait..."):
+        with st.spinner("Processing leads in parallel across Gemini accounts. Please wait..."):
             progress = st.progress(0)
             status = st.empty()
             results_placeholder = st.empty()
             outputs = []
             total = len(lead_details_list)
-            done = 0
-
-            for acc_idx, (api_key, leads) in enumerate(zip(gemini_api_keys, leads_per_account)):
-                status.text(f"Processing leads for Gemini Account #{acc_idx+1}...")
-                account_outputs = []
+            evaluator = get_lead_evaluator()
+            cache_before = get_llm_cache().stats()
+            usage_tracker = UsageTracker()
+
+            # Leads already scored with the same prompt come straight from the local cache,
+            # without waiting on a Gemini key's rate limiter
+            uncached_per_account = []
+            for leads in leads_per_account:
+                uncached = []
                 for lead_info in leads:
-                    try:
-                        result = evaluate_lead(lead_info, api_key=api_key)
-                    except Exception as e:
+                    cached = evaluator.cached_result(lead_info)
+                    if cached is None:
+                        uncached.append(lead_info)
+                    else:
+                        outputs.append(cached)
+                uncached_per_account.append(uncached)
+            done = len(outputs)
+            if done:
+                progress.progress(min(done / total, 1.0))
+                results_placeholder.dataframe(pd.DataFrame(outputs))
+
+            if batch_mode:
+                task = functools.partial(evaluator.evaluate_batch, check_cache=False, usage_tracker=usage_tracker)
+                work_per_account = [evaluator.plan_batches(leads, token_budget=batch_token_budget) for leads in uncached_per_account]
+                status.text(f"{done} leads from cache, scoring {total - done} leads in {sum(len(b) for b in work_per_account)} Gemini calls...")
+            else:
+                task = functools.partial(evaluator.evaluate, check_cache=False, usage_tracker=usage_tracker)
+                work_per_account = uncached_per_account
+
+            # Every key works through its own leads concurrently; results arrive in completion order
+            for acc_idx, item, item_result, item_error in run_per_key(
+                task,
+                gemini_api_keys,
+                work_per_account,
+                max_concurrency_per_key=max_concurrency_per_key,
+                requests_per_minute=requests_per_minute,
+                pass_limiter=batch_mode,
+            ):
+                if not batch_mode:
+                    lead_outcomes = [(item, item_result, item_error)]
+                elif item_error is not None:
+                    lead_outcomes = [(lead_info, None, item_error) for lead_info in item]
+                else:
+                    lead_outcomes = item_result
+
+                for lead_info, result, error in lead_outcomes:
+                    if error is not None:
                         result = {
                             "lead_id": lead_info.get("lead_id"),
                             "name": lead_info.get("name"),
                             "linkedin_url": lead_info.get("profile_url"),
                             "score": 0,
-                            "response": f"Error: {e}",
+                            "response": f"Error: {error}",
                             "message_generated": None,
                             "contacts_enriched": None,
                             "should_contact": None,
                             "input_tokens": 0,
-                            "output_tokens": 0
+                            "output_tokens": 0,
+                            "latency_ms": None,
+                            "api_key_id": None
                         }
                     if "lead_id" in lead_info:
                         result["lead_id"] = lead_info["lead_id"]
-                    account_outputs.append(result)
                     outputs.append(result)
                     done += 1
-                    progress.progress(min(done / total, 1.0))
-                    status.text(f"Completed {done} out of {total} leads...")
-                    try:
-                        results_placeholder.dataframe(pd.DataFrame(outputs))
-                    except Exception:
-                        pass
-                status.text(f"Finished Gemini Account #{acc_idx+1}")
+                progress.progress(min(done / total, 1.0))
+                status.text(f"Completed {done} out of {total} leads (last from Gemini Account #{acc_idx+1})...")
+                try:
+                    results_placeholder.dataframe(pd.DataFrame(outputs))
+                except Exception:
+                    pass
 
             status.text("Completed all accounts.")
 
-        # Code to update database (supabase)
-        for result in outputs:
-            try:
-                # Insert the data in llm_response table
-                supabase.table("llm_response").insert(result).execute()
-                # Update the sent_to_llm column in lead_details table as True
-                supabase.table("lead_details").update({"sent_to_llm": True}).eq("lead_id", result['lead_id']).execute()
-            except Exception as e:
-                print(f"Error inserting data: {e}")
+        cache_after = get_llm_cache().stats()
+        st.caption(
+            f"LLM cache: {cache_after['hits'] - cache_before['hits']} hits, "
+            f"{cache_after['misses'] - cache_before['misses']} misses this run "
+            f"({cache_after['entries']} entries stored)"
+        )
+        st.markdown("#### Gemini usage for this run")
+        st.dataframe(pd.DataFrame(usage_tracker.summary()))
+
+        # Code to update database (supabase): chunked upsert into llm_response, then set-based sent_to_llm update
+        with st.spinner("Saving results to Supabase..."):
+            write_reports = save_scored_leads(supabase, outputs)
+        invalidate_lead_lists()
+        for report in write_reports:
+            if report["errors"]:
+                for err in report["errors"]:
+                    st.error(f"Writing chunk {err['chunk']} of {report['table']} failed ({len(err['ids'])} leads): {err['error']}")
+            else:
+                st.caption(f"Saved {report['rows']} rows to {report['table']} in {report['requests']} request(s).")
 
         results_df = pd.DataFrame(outputs)
         st.dataframe(results_df)
@@ -466,32 +723,6 @@ with tab4:
 #     return leads_to_generate_message[0:limit]
 
 
-def fetch_leads_for_message_generate(limit: int):
-    # 1. Fetch lead_ids from llm_response where message_generated = 'no'
-    llm_responses_res = (
-        supabase.table("llm_response")
-        .select("lead_id")
-        .eq("message_generated", "no")
-        .execute()
-    )
-    llm_resp_lead_ids = [resp["lead_id"] for resp in (llm_responses_res.data or [])]
-
-    if not llm_resp_lead_ids:
-        return []
-
-    # 2. Fetch matching leads in one query
-    leads_res = (
-        supabase.table("lead_details")
-        .select("*")
-        .in_("lead_id", llm_resp_lead_ids)
-        .limit(limit)
-        .execute()
-    )
-
-    return leads_res.data or []
-
-
-
 with tab5:
     st.header("Generate Personalised Messages for Relevant Leads")
 
@@ -549,45 +780,61 @@ with tab5:
             outputs = []
             total = len(lead_details_list)
             done = 0
+            cache_before = get_llm_cache().stats()
+            usage_tracker = UsageTracker()
 
-            # Sequential processing of accounts
-            for acc_idx, (api_key, leads) in enumerate(zip(gemini_api_keys, leads_per_account)):
-                status.text(f"Processing leads for Gemini Account #{acc_idx+1}...")
-                for lead_info in leads:
-                    try:
-                        result = message_lead(lead_info, api_key=api_key)
-                    except Exception as e:
-                        result = {
-                            "lead_id": lead_info.get("lead_id"),
-                            "linkedin_url": lead_info.get("profile_url"),
-                            "name": lead_info.get("name"),
-                            "subject": "",
-                            "message": f"Error: {e}"
-                        }
-                    if "lead_id" in lead_info:
-                        result["lead_id"] = lead_info["lead_id"]
-                    outputs.append(result)
-                    done += 1
-                    progress.progress(min(done / total, 1.0))
-                    status.text(f"Completed {done} out of {total} leads...")
-                    try:
-                        # Display the result immediately after processing
-                        results_placeholder.dataframe(pd.DataFrame(outputs))
-                    except Exception:
-                        st.error("Error displaying results.")
-                status.text(f"Finished Gemini Account #{acc_idx+1}")
-
-            status.text("Completed all accounts.")
-
-        # Code to update database (supabase)
-        for result in outputs:
+            # Messages are written to Supabase in batches by a background thread while generation continues
+            message_writer = BatchWriter(lambda rows: save_messages(supabase, rows), batch_size=25, flush_interval=5.0, max_queue=200, name="message-writer")
             try:
-                # Insert the data in message table
-                supabase.table("message").insert(result).execute()
-                # Update the message_generated column in llm_response table as True
-                supabase.table("llm_response").update({"message_generated": 'yes'}).eq("lead_id", result['lead_id']).execute()
-            except Exception as e:
-                st.error(f"Error inserting/updating data for lead_id {result.get('lead_id')}: {e}")
+                # Sequential processing of accounts
+                for acc_idx, (api_key, leads) in enumerate(zip(gemini_api_keys, leads_per_account)):
+                    status.text(f"Processing leads for Gemini Account #{acc_idx+1}...")
+                    for lead_info in leads:
+                        try:
+                            result = message_lead(lead_info, api_key=api_key, usage_tracker=usage_tracker)
+                        except Exception as e:
+                            result = {
+                                "lead_id": lead_info.get("lead_id"),
+                                "linkedin_url": lead_info.get("profile_url"),
+                                "name": lead_info.get("name"),
+                                "subject": "",
+                                "message": f"Error: {e}",
+                                "input_tokens": 0,
+                                "output_tokens": 0,
+                                "latency_ms": None,
+                                "api_key_id": None
+                            }
+                        if "lead_id" in lead_info:
+                            result["lead_id"] = lead_info["lead_id"]
+                        outputs.append(result)
+                        message_writer.put(result)
+                        done += 1
+                        progress.progress(min(done / total, 1.0))
+                        status.text(f"Completed {done} out of {total} leads ({message_writer.flushed_rows} saved to Supabase)...")
+                        try:
+                            # Display the result immediately after processing
+                            results_placeholder.dataframe(pd.DataFrame(outputs))
+                        except Exception:
+                            st.error("Error displaying results.")
+                    status.text(f"Finished Gemini Account #{acc_idx+1}")
+            finally:
+                status.text("Saving remaining messages to Supabase...")
+                message_writer.close()
+                invalidate_lead_lists()
+
+            status.text(f"Completed all accounts. {message_writer.flushed_rows} messages saved to Supabase.")
+
+        cache_after = get_llm_cache().stats()
+        st.caption(
+            f"LLM cache: {cache_after['hits'] - cache_before['hits']} hits, "
+            f"{cache_after['misses'] - cache_before['misses']} misses this run "
+            f"({cache_after['entries']} entries stored)"
+        )
+        st.markdown("#### Gemini usage for this run")
+        st.dataframe(pd.DataFrame(usage_tracker.summary()))
+
+        for err in message_writer.errors:
+            st.error(f"Writing {len(err['ids'])} rows to {err['table']} failed: {err['error']}")
 
         results_df = pd.DataFrame(outputs)
         st.dataframe(results_df)
@@ -604,4 +851,7 @@ with tab5:
             towrite.seek(0)
             st.download_button("Download Results as Excel", towrite.read(), "message.xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", key="download_excel_tab5")
         except Exception:
-            st.error("Error generating Excel file.")
\ No newline at end of file
+            st.error("Error generating Excel file.")
+
+
+supabase_calls_placeholder.caption(f"Supabase queries this rerun: {st.session_state.get('supabase_calls', 0)}")
@@ -0,0 +1,44 @@
+"""
+Benchmark: Supabase round trips for persisting scored leads (tab 3).
+
+Compares the old per-lead insert + update loop (2N requests) with the
+chunked upsert + in_() update in stages.db_writes (about 2N/chunk).
+
+Run from the repo root:
+    python -m benchmarks.bench_db_writes --leads 2000 --latency 0.05
+"""
+import argparse
+import time
+
+from benchmarks.fake_supabase import FakeSupabase
+from stages.db_writes import save_scored_leads
+
+
+def legacy_save(client, results):
+    for result in results:
+        client.table("llm_response").insert(result).execute()
+        client.table("lead_details").update({"sent_to_llm": True}).eq("lead_id", result['lead_id']).execute()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=2000)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated seconds per request")
+    args = parser.parse_args()
+
+    results = [{"lead_id": f"lead-{i}", "score": 70, "response": "ok"} for i in range(args.leads)]
+
+    print(f"{'path':<28}{'requests':>10}{'seconds':>10}")
+    for name, fn in [
+        ("per-lead insert + update", lambda c: legacy_save(c, results)),
+        ("chunked upsert + in_()", lambda c: save_scored_leads(c, results, chunk_size=args.chunk_size)),
+    ]:
+        client = FakeSupabase(latency=args.latency)
+        start = time.perf_counter()
+        fn(client)
+        print(f"{name:<28}{client.requests:>10}{time.perf_counter() - start:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Micro-benchmark: per-call overhead of evaluate_lead / message_lead setup.
+
+Compares rebuilding the evaluator/writer for every lead (what the old
+evaluate_lead/message_lead did) against one long-lived LeadEvaluator /
+MessageWriter, both against an offline fake chat model.
+
+Run from the repo root:
+    python -m benchmarks.bench_llm_setup --calls 500
+"""
+import argparse
+import time
+
+from benchmarks.fake_llm import fake_llm_factory
+from stages.stage_3 import LeadEvaluator
+from stages.stage_message import MessageWriter
+
+SAMPLE_LEAD = {
+    "lead_id": "jane-doe-123",
+    "name": "Jane Doe",
+    "title": "VP Sales Operations",
+    "location": "Austin, Texas, United States",
+    "profile_url": "https://www.linkedin.com/in/jane-doe-123",
+    "bio": "Revenue operations leader",
+    "skills": ["Salesforce", "Forecasting"],
+    "experience": "VP Sales Operations at Acme Logistics",
+    "company_name": "Acme Logistics",
+    "company_page_url": "https://www.linkedin.com/company/acme-logistics/",
+}
+
+
+def _time_per_call(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1000
+
+
+def _gemini_client_ms(calls=20):
+    """Cost of constructing a real ChatGoogleGenerativeAI (no network call is made)"""
+    try:
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        return _time_per_call(
+            lambda: ChatGoogleGenerativeAI(model='models/gemini-2.5-flash', google_api_key="benchmark-key"),
+            calls
+        )
+    except Exception as e:
+        print(f"Skipping ChatGoogleGenerativeAI construction timing: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+
+    evaluator = LeadEvaluator(llm_factory=fake_llm_factory)
+    writer = MessageWriter(llm_factory=fake_llm_factory)
+
+    cases = [
+        ("evaluate_lead (rebuild per lead)",
+         lambda: LeadEvaluator(llm_factory=fake_llm_factory).evaluate(SAMPLE_LEAD, "key-1")),
+        ("LeadEvaluator (reused)",
+         lambda: evaluator.evaluate(SAMPLE_LEAD, "key-1")),
+        ("message_lead (rebuild per lead)",
+         lambda: MessageWriter(llm_factory=fake_llm_factory).write(SAMPLE_LEAD, "key-1")),
+        ("MessageWriter (reused)",
+         lambda: writer.write(SAMPLE_LEAD, "key-1")),
+    ]
+
+    print(f"{'case':<36}{'ms/call':>10}")
+    for name, fn in cases:
+        fn()  # warm up imports and caches
+        print(f"{name:<36}{_time_per_call(fn, args.calls):>10.3f}")
+
+    client_ms = _gemini_client_ms()
+    if client_ms is not None:
+        print(f"{'+ real Gemini client construction':<36}{client_ms:>10.3f}  (paid per lead before, once per key now)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: seconds per profile for stage 2 field extraction.
+
+Loads the saved profile pages in benchmarks/fixtures/profiles into a headless
+Chrome and times the original per-field waits (extract_profile_per_field, one
+wait.until per field) against the single wait + one execute_script call of
+extract_profile_single_pass. Navigation and the human-like delays are left out;
+only extraction is timed. Both paths must return the same fields.
+
+Needs Chrome + chromedriver, but no Supabase credentials. Without Chrome it only
+reports the waits that dominate the difference, counted offline with lxml: every
+field a page lacks costs the per-field path a full --timeout wait, the single
+pass none. Run from the repo root:
+    python -m benchmarks.bench_profile_extraction --repeat 3 --timeout 10
+"""
+import os
+import glob
+import time
+import argparse
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+
+from stages.profile_extraction import extract_profile_per_field, extract_profile_single_pass
+from stages.profile_fields import PROFILE_XPATHS
+from stages.profile_snapshots import matches_from_html
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "profiles")
+
+
+def fixture_pages():
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "*.html"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        yield name, path, f"https://www.linkedin.com/in/{name}/"
+
+
+def report_missing_field_waits(timeout):
+    """Seconds each path spends waiting on absent fields, without a browser"""
+    print(f"{'fixture':<14}{'missing fields':>16}{'per-field waits':>17}{'single-pass waits':>19}")
+    for name, path, url in fixture_pages():
+        with open(path, "r", encoding="utf-8") as f:
+            matches = matches_from_html(f.read(), url)
+        missing = [field for field in PROFILE_XPATHS if not matches.get(field)]
+        print(f"{name:<14}{len(missing):>16}{len(missing) * timeout:>16.0f}s{0:>18.0f}s  {', '.join(missing)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="Extractions per fixture and path")
+    parser.add_argument("--timeout", type=float, default=10, help="WebDriverWait timeout (scrape_profile uses 10)")
+    args = parser.parse_args()
+
+    chrome_options = Options()
+    chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    try:
+        driver = webdriver.Chrome(options=chrome_options)
+    except Exception as e:
+        print(f"Chrome is not available ({str(e).splitlines()[0]}); counting waits offline instead\n")
+        report_missing_field_waits(args.timeout)
+        return
+    wait = WebDriverWait(driver, args.timeout)
+
+    print(f"{'fixture':<14}{'path':<14}{'s/profile':>10}{'same fields':>13}")
+    try:
+        for name, path, url in fixture_pages():
+            driver.get("file://" + os.path.abspath(path))
+            results = {}
+            for label, extract in [("per-field", extract_profile_per_field), ("single-pass", extract_profile_single_pass)]:
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    results[label] = extract(driver, url, wait)
+                seconds = (time.perf_counter() - start) / args.repeat
+                same = "" if label == "per-field" else str(results["per-field"] == results["single-pass"])
+                print(f"{name:<14}{label:<14}{seconds:>10.3f}{same:>13}")
+    finally:
+        driver.quit()
+
+
+if __name__ == "__main__":
+    main()
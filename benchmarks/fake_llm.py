@@ -0,0 +1,55 @@
+import json
+import re
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+def default_responder(messages: List[BaseMessage]) -> str:
+    """Answer with JSON that satisfies whichever parser the prompt asks for"""
+    prompt = messages[-1].content
+    if "RESULTS" in prompt:
+        lead_ids = re.findall(r"\(lead_id: ([^)]*)\)", prompt)
+        return json.dumps({"RESULTS": [
+            {"LEAD_ID": lead_id, "SCORE": 72, "RESPONSE": "Fake reasoning for benchmarking.", "SHOULD_CONTACT": 1}
+            for lead_id in lead_ids
+        ]})
+    if "SUBJECT" in prompt:
+        return json.dumps({"SUBJECT": "See you at Dreamforce?", "MESSAGE": "Hi there, fake message."})
+    return json.dumps({"SCORE": 72, "RESPONSE": "Fake reasoning for benchmarking.", "SHOULD_CONTACT": 1})
+
+
+def _approx_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+class FakeGeminiChat(BaseChatModel):
+    """Offline stand-in for ChatGoogleGenerativeAI; reports usage like Gemini does"""
+
+    responder: Any = None
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-gemini"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        content = (self.responder or default_responder)(messages)
+        input_tokens = sum(_approx_tokens(m.content) for m in messages)
+        output_tokens = _approx_tokens(content)
+        message = AIMessage(content=content, usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        })
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def fake_llm_factory(api_key, **kwargs):
+    return FakeGeminiChat(**kwargs)
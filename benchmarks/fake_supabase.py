@@ -0,0 +1,46 @@
+import time
+from types import SimpleNamespace
+
+
+class _FakeQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.rows = []
+
+    def insert(self, rows, **kwargs):
+        self.rows = rows if isinstance(rows, list) else [rows]
+        return self
+
+    upsert = insert
+
+    def update(self, values, **kwargs):
+        return self
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def eq(self, column, value):
+        self.rows = [{column: value}]
+        return self
+
+    def in_(self, column, values):
+        self.rows = [{column: v} for v in values]
+        return self
+
+    def execute(self):
+        self.client.requests += 1
+        if self.client.latency:
+            time.sleep(self.client.latency)
+        return SimpleNamespace(data=list(self.rows))
+
+
+class FakeSupabase:
+    """Counts round trips instead of talking to Supabase; optional per-request latency"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.requests = 0
+
+    def table(self, name):
+        return _FakeQuery(self, name)
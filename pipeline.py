@@ -0,0 +1,300 @@
+"""
+Headless scout -> scrape -> score -> message pipeline.
+
+Runs the same stages as the Streamlit tabs, but as concurrent workers linked by
+bounded queues: a profile is scored while the next one is still loading, and a
+message is written as soon as its lead scores high enough.
+
+Examples (run from the repo root):
+    python pipeline.py --keywords "#dreamforce2025" --scout-account a@x.com \
+        --scrape-accounts b@x.com,c@x.com --gemini-keys KEY1,KEY2
+    python pipeline.py --resume-from-db --scrape-accounts b@x.com --limit 200
+"""
+import os
+import time
+import queue
+import argparse
+import logging
+import threading
+from supabase import create_client, Client
+from dotenv import load_dotenv
+
+from stages.stage_1 import scout_leads
+from stages.stage_2 import get_linkedin_profile_details, get_profile_sink
+from stages.stage_3 import get_lead_evaluator
+from stages.stage_message import get_message_writer
+from stages.llm_executor import RateLimiter
+from stages.pacing import pacing_stats
+from stages.browser_pool import get_browser_pool
+from stages.page_weight import BLOCK_PROFILES, get_page_weight_stats
+from stages.llm_usage import UsageTracker
+from stages.db_writes import BatchWriter, save_scored_leads, save_messages
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("pipeline")
+
+# Set up supabase
+load_dotenv()
+url: str = os.getenv("SUPABASE_URL")
+key: str = os.getenv("SUPABASE_KEY")
+supabase: Client = create_client(url, key)
+
+LEAD_COLUMNS = ("lead_id", "name", "title", "location", "profile_url", "bio", "skills", "experience", "company_name", "company_page_url")
+
+
+class StageQueue(queue.Queue):
+    """Bounded queue between two stages; consumers iterate it until every producer has closed it"""
+
+    _DONE = object()
+
+    def __init__(self, maxsize: int, producers: int):
+        super().__init__(maxsize)
+        self._producers = producers
+        self._lock = threading.Lock()
+        if producers == 0:
+            self.put(self._DONE)
+
+    def close(self):
+        """Called once by each producer when it has nothing more to send"""
+        with self._lock:
+            self._producers -= 1
+            last = self._producers == 0
+        if last:
+            self.put(self._DONE)
+
+    def __iter__(self):
+        while True:
+            item = self.get()
+            if item is self._DONE:
+                # Put it back so the other consumers stop too
+                self.put(item)
+                return
+            yield item
+
+    def discard_rest(self) -> int:
+        """Consume and drop everything still coming (no consumers are left)"""
+        return sum(1 for _ in self)
+
+
+class Counters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.values = {}
+
+    def add(self, name: str, amount: int = 1):
+        with self._lock:
+            self.values[name] = self.values.get(name, 0) + amount
+
+
+def fetch_passwords(emails):
+    response = supabase.table("Accounts").select("email_id", "password").in_("email_id", list(emails)).execute()
+    return {item['email_id']: item['password'] for item in (response.data or [])}
+
+
+def fetch_unscraped_urls(limit):
+    response = supabase.table("all_leads").select("linkedin_url").eq("scraped", False).limit(limit).execute()
+    return [item['linkedin_url'] for item in (response.data or [])]
+
+
+def fetch_unscored_leads(limit):
+    response = supabase.table("lead_details").select(*LEAD_COLUMNS).eq("sent_to_llm", False).limit(limit).execute()
+    return response.data or []
+
+
+def fetch_unmessaged_leads(limit):
+    llm_responses_res = supabase.table("llm_response").select("lead_id").eq("message_generated", "no").limit(limit).execute()
+    lead_ids = [resp["lead_id"] for resp in (llm_responses_res.data or [])]
+    if not lead_ids:
+        return []
+    return supabase.table("lead_details").select("*").in_("lead_id", lead_ids).limit(limit).execute().data or []
+
+
+def run_pipeline(args):
+    scrape_accounts = [a.strip() for a in (args.scrape_accounts or "").split(",") if a.strip()]
+    gemini_keys = [k.strip() for k in (args.gemini_keys or os.getenv("GEMINI_API_KEYS", "")).split(",") if k.strip()]
+    scouting = bool(args.search_url or args.keywords)
+
+    passwords = fetch_passwords(set(scrape_accounts) | ({args.scout_account} if scouting else set()))
+    counters = Counters()
+    usage_tracker = UsageTracker()
+    evaluator = get_lead_evaluator()
+    message_writer = get_message_writer()
+    limiters = {api_key: RateLimiter(args.rpm) for api_key in gemini_keys}
+    started = time.time()
+
+    score_workers = len(gemini_keys) * args.score_concurrency
+    url_q = StageQueue(args.queue_size, producers=int(scouting) + int(args.resume_from_db))
+    score_q = StageQueue(args.queue_size, producers=len(scrape_accounts) + int(args.resume_from_db))
+    message_q = StageQueue(args.queue_size, producers=(score_workers if not args.skip_messages else 0) + int(args.resume_from_db and not args.skip_messages))
+
+    profile_sink = get_profile_sink()
+
+    def write_scores(rows):
+        # sent_to_llm is an update on lead_details: land the profiles behind these scores
+        # first (they were queued before being scored), or the update matches no row
+        profile_sink.flush()
+        return save_scored_leads(supabase, rows)
+
+    score_writer = BatchWriter(write_scores, name="score-writer")
+    message_db_writer = BatchWriter(lambda rows: save_messages(supabase, rows), name="message-writer")
+
+    def start(name, target, *target_args):
+        thread = threading.Thread(target=target, args=target_args, name=name, daemon=True)
+        thread.start()
+        return thread
+
+    # --- Stage 1: scout (leads new to all_leads go straight to the scrapers) ---
+    def on_post_leads(new_leads):
+        # Already written to all_leads by scout_leads
+        counters.add("scouted", len(new_leads))
+        for lead in new_leads:
+            url_q.put(lead["linkedin_url"])
+
+    def scout_stage():
+        try:
+            scout_leads(time_to_load=args.time_to_load, username=args.scout_account, password=passwords.get(args.scout_account),
+                        search_url=args.search_url or "", keywords=args.keywords or "", leads_callback=on_post_leads,
+                        target_posts=args.target_posts, skip_known=not args.rescan_known)
+        finally:
+            url_q.close()
+
+    def seed(target_q, rows, counter_name):
+        try:
+            for row in rows:
+                target_q.put(row)
+            counters.add(counter_name, len(rows))
+        finally:
+            target_q.close()
+
+    # --- Stage 2: scrape, one browser per account pulling from the shared URL queue ---
+    def scrape_stage(username):
+        try:
+            def on_profile(profile):
+                counters.add("scraped")
+                score_q.put({column: profile.get(column) for column in LEAD_COLUMNS})
+            get_linkedin_profile_details(iter(url_q), username=username, password=passwords.get(username), profile_callback=on_profile,
+                                         target_per_hour=args.target_per_hour, daily_cap=args.daily_cap)
+        finally:
+            score_q.close()
+
+    # --- Stage 3: score, score_concurrency workers per Gemini key ---
+    def score_stage(api_key):
+        try:
+            for lead_info in score_q:
+                try:
+                    # Cache hits skip the key's rate limiter
+                    result = evaluator.cached_result(lead_info)
+                    if result is None:
+                        limiters[api_key].acquire()
+                        result = evaluator.evaluate(lead_info, api_key, check_cache=False, usage_tracker=usage_tracker)
+                except Exception as e:
+                    # Leave sent_to_llm=False so the next run picks the lead up again
+                    logger.warning(f"Scoring failed for {lead_info.get('lead_id')}: {e}")
+                    counters.add("score_failed")
+                    continue
+                counters.add("scored")
+                score_writer.put(result)
+                if not args.skip_messages and result.get("message_generated") == 'no':
+                    message_q.put(lead_info)
+        finally:
+            if not args.skip_messages:
+                message_q.close()
+
+    # --- Stage 4: outreach messages for leads that scored high enough ---
+    def message_stage(api_key):
+        for lead_info in message_q:
+            try:
+                limiters[api_key].acquire()
+                result = message_writer.write(lead_info, api_key, usage_tracker=usage_tracker)
+            except Exception as e:
+                logger.warning(f"Message generation failed for {lead_info.get('lead_id')}: {e}")
+                counters.add("message_failed")
+                continue
+            counters.add("messaged")
+            message_db_writer.put(result)
+
+    if scouting:
+        start("scout", scout_stage)
+    if args.resume_from_db:
+        start("seed-urls", seed, url_q, fetch_unscraped_urls(args.limit) if scrape_accounts else [], "seeded_urls")
+        start("seed-scores", seed, score_q, fetch_unscored_leads(args.limit), "seeded_scores")
+        if not args.skip_messages:
+            start("seed-messages", seed, message_q, fetch_unmessaged_leads(args.limit), "seeded_messages")
+
+    scrapers = [start(f"scrape-{i + 1}", scrape_stage, username) for i, username in enumerate(scrape_accounts)]
+    scorers = [start(f"score-{k + 1}-{w + 1}", score_stage, api_key)
+               for k, api_key in enumerate(gemini_keys) for w in range(args.score_concurrency)]
+    messengers = [] if args.skip_messages else [
+        start(f"message-{k + 1}-{w + 1}", message_stage, api_key)
+        for k, api_key in enumerate(gemini_keys) for w in range(args.message_concurrency)]
+
+    # If every scraper exits (e.g. all logins failed) nobody else drains the URL queue;
+    # those leads keep scraped=False in all_leads and are picked up by the next run
+    for thread in scrapers:
+        thread.join()
+    dropped = url_q.discard_rest()
+    if dropped:
+        logger.warning(f"All scrapers stopped, {dropped} URLs left for the next run")
+    for thread in scorers + messengers:
+        thread.join()
+
+    score_writer.close()
+    message_db_writer.close()
+
+    elapsed = time.time() - started
+    logger.info(f"Pipeline finished in {elapsed / 60:.1f} min: {counters.values}")
+    browser_pool = get_browser_pool()
+    logger.info(f"Browsers {browser_pool.metrics()}")
+    browser_pool.shutdown()
+    for row in get_page_weight_stats().summary():
+        logger.info(f"Page weight {row}")
+    for row in pacing_stats():
+        logger.info(f"Pacing {row}")
+    for row in usage_tracker.summary():
+        logger.info(f"Gemini usage {row}")
+    for err in score_writer.errors + message_db_writer.errors:
+        logger.error(f"Write to {err['table']} failed for {len(err['ids'])} rows: {err['error']}")
+    return counters.values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--search-url", help="LinkedIn post search URL to scout")
+    parser.add_argument("--keywords", help="Keywords to search posts for (instead of --search-url)")
+    parser.add_argument("--scout-account", help="Accounts.email_id used for scouting")
+    parser.add_argument("--time-to-load", type=int, default=60, help="Max seconds to scroll the search results")
+    parser.add_argument("--target-posts", type=int, default=None, help="Posts to harvest (default: until the results run out)")
+    parser.add_argument("--rescan-known", action="store_true", help="Also harvest posts and leads collected by earlier runs")
+    parser.add_argument("--scrape-accounts", help="Comma-separated Accounts.email_id values, one browser each")
+    parser.add_argument("--headless", action="store_true", help="Run Chrome headless (default BROWSER_HEADLESS)")
+    parser.add_argument("--block-profile", choices=list(BLOCK_PROFILES), default=None,
+                        help="Page resources to block (default BROWSER_BLOCK_PROFILE, else light)")
+    parser.add_argument("--target-per-hour", type=float, default=None, help="Profiles per hour per scrape account (default PACING_TARGET_PER_HOUR)")
+    parser.add_argument("--daily-cap", type=int, default=None, help="Profile visits per scrape account per day (default PACING_DAILY_CAP)")
+    parser.add_argument("--gemini-keys", help="Comma-separated Gemini API keys (default: GEMINI_API_KEYS env var)")
+    parser.add_argument("--score-concurrency", type=int, default=4, help="Scoring workers per Gemini key")
+    parser.add_argument("--message-concurrency", type=int, default=2, help="Message workers per Gemini key")
+    parser.add_argument("--rpm", type=int, default=10, help="Requests per minute per Gemini key (0 = no limit)")
+    parser.add_argument("--queue-size", type=int, default=100, help="Capacity of each queue between stages")
+    parser.add_argument("--resume-from-db", action="store_true", help="Also pick up unscraped / unscored / unmessaged leads from Supabase")
+    parser.add_argument("--limit", type=int, default=500, help="Max rows per stage to pick up with --resume-from-db")
+    parser.add_argument("--skip-messages", action="store_true", help="Stop after scoring")
+    args = parser.parse_args()
+
+    if (args.search_url or args.keywords) and not args.scout_account:
+        parser.error("--scout-account is required when scouting")
+    if (args.search_url or args.keywords) and not args.scrape_accounts:
+        parser.error("--scrape-accounts is required when scouting")
+    if not (args.gemini_keys or os.getenv("GEMINI_API_KEYS")):
+        parser.error("--gemini-keys or GEMINI_API_KEYS is required")
+
+    if args.headless:
+        get_browser_pool().headless = True
+    if args.block_profile:
+        get_browser_pool().block_profile = args.block_profile
+    run_pipeline(args)
+
+
+if __name__ == "__main__":
+    main()
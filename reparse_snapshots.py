@@ -0,0 +1,82 @@
+"""
+Re-parse stored profile snapshots with the current (or updated) selectors.
+
+Snapshots are the gzipped page sources stage 2 keeps when scraping with
+snapshot_dir / parse_offline. Parsing runs in a process pool and needs no
+network access, so fixing a broken XPath never costs another scrape.
+
+Examples (run from the repo root):
+    python reparse_snapshots.py --output reparsed.csv
+    python reparse_snapshots.py --xpaths new_selectors.json --output reparsed.jsonl
+    python reparse_snapshots.py --save-to-supabase
+--xpaths is a JSON object of field -> XPath overriding entries of PROFILE_XPATHS.
+"""
+import os
+import json
+import time
+import argparse
+import logging
+import pandas as pd
+
+from stages.profile_fields import PROFILE_XPATHS
+from stages.profile_snapshots import SNAPSHOT_DIR, parse_archive
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("reparse_snapshots")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR, help=f"Directory of .html.gz snapshots (default {SNAPSHOT_DIR})")
+    parser.add_argument("--xpaths", help="JSON file with updated selectors (field -> XPath)")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: one per CPU)")
+    parser.add_argument("--output", default="reparsed_profiles.csv", help="Output file, .csv or .jsonl")
+    parser.add_argument("--save-to-supabase", action="store_true", help="Also upsert the profiles into lead_details")
+    args = parser.parse_args()
+
+    xpaths = dict(PROFILE_XPATHS)
+    if args.xpaths:
+        with open(args.xpaths, "r", encoding="utf-8") as f:
+            overrides = json.load(f)
+        unknown = set(overrides) - set(PROFILE_XPATHS)
+        if unknown:
+            parser.error(f"Unknown fields in {args.xpaths}: {', '.join(sorted(unknown))}")
+        xpaths.update(overrides)
+
+    started = time.time()
+    profiles, empty, failed = [], 0, 0
+    for path, profile, error in parse_archive(args.snapshot_dir, xpaths=xpaths, workers=args.workers):
+        if error:
+            failed += 1
+            logger.error(f"Could not parse {path}: {error}")
+        elif profile is None:
+            empty += 1
+            logger.warning(f"No profile card found in {path}")
+        else:
+            profiles.append(profile)
+    logger.info(f"Parsed {len(profiles)} profiles in {time.time() - started:.1f}s ({empty} without a profile card, {failed} failed)")
+
+    if args.output.endswith(".jsonl"):
+        with open(args.output, "w", encoding="utf-8") as f:
+            for profile in profiles:
+                f.write(json.dumps(profile, ensure_ascii=False) + "\n")
+    else:
+        pd.DataFrame(profiles).to_csv(args.output, index=False)
+    logger.info(f"Wrote {args.output}")
+
+    if args.save_to_supabase and profiles:
+        from supabase import create_client
+        from dotenv import load_dotenv
+        from stages.db_writes import save_scraped_profiles
+
+        load_dotenv()
+        client = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+        for report in save_scraped_profiles(client, profiles):
+            logger.info(f"{report['table']}: {report['written']} of {report['rows']} rows written in {report['requests']} requests")
+            for err in report["errors"]:
+                logger.error(f"Write to {report['table']} failed for {len(err['ids'])} rows: {err['error']}")
+
+
+if __name__ == "__main__":
+    main()
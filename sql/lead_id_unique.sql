@@ -0,0 +1,42 @@
+-- Unique lead_id on every table written with upsert(on_conflict="lead_id") in stages/db_writes.py:
+-- llm_response (save_scored_leads), message (save_messages), lead_details (save_scraped_profiles)
+-- and all_leads (ingest_leads). PostgREST rejects those upserts without one.
+-- Run once in the Supabase SQL editor. It deletes nothing: if a table already holds duplicate
+-- lead_ids it stops before adding any constraint, and running it again after the fix is safe.
+
+-- Duplicates block the constraints. List them and decide by hand which row to keep
+-- (e.g. the all_leads row with scraped = true, the latest lead_details scrape)
+select 'llm_response' as table_name, lead_id, count(*) as copies from llm_response group by lead_id having count(*) > 1
+union all
+select 'message', lead_id, count(*) from message group by lead_id having count(*) > 1
+union all
+select 'lead_details', lead_id, count(*) from lead_details group by lead_id having count(*) > 1
+union all
+select 'all_leads', lead_id, count(*) from all_leads group by lead_id having count(*) > 1
+order by table_name, lead_id;
+
+do $$
+declare
+    t text;
+    dupes bigint;
+    blocked text := '';
+begin
+    foreach t in array array['llm_response', 'message', 'lead_details', 'all_leads'] loop
+        execute format('select count(*) from (select lead_id from %I group by lead_id having count(*) > 1) d', t)
+            into dupes;
+        if dupes > 0 then
+            blocked := blocked || format(' %s (%s lead_ids)', t, dupes);
+        end if;
+    end loop;
+    if blocked <> '' then
+        raise exception 'Duplicate lead_ids in:%. Resolve them with the query above, then run this again', blocked;
+    end if;
+
+    foreach t in array array['llm_response', 'message', 'lead_details', 'all_leads'] loop
+        begin
+            execute format('alter table %I add constraint %I unique (lead_id)', t, t || '_lead_id_key');
+        exception when duplicate_table or duplicate_object then
+            null;  -- already there
+        end;
+    end loop;
+end $$;
@@ -0,0 +1,13 @@
+-- Per-call Gemini usage stored with every score and message row.
+-- Run once in the Supabase SQL editor. Written by stages/stage_3.py and stages/stage_message.py.
+-- Rows answered from the local LLM cache have 0 tokens, 0 ms and api_key_id = 'cache'.
+
+alter table llm_response add column if not exists input_tokens int;
+alter table llm_response add column if not exists output_tokens int;
+alter table llm_response add column if not exists latency_ms int;
+alter table llm_response add column if not exists api_key_id text;
+
+alter table message add column if not exists input_tokens int;
+alter table message add column if not exists output_tokens int;
+alter table message add column if not exists latency_ms int;
+alter table message add column if not exists api_key_id text;
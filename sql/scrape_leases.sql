@@ -0,0 +1,60 @@
+-- Lease-based claiming of scrape work on all_leads.
+-- Run once in the Supabase SQL editor. Used by stages/work_queue.py (SupabaseLeaseQueue).
+
+alter table all_leads add column if not exists scrape_status text not null default 'pending';  -- pending | in_progress | done
+alter table all_leads add column if not exists lease_owner text;
+alter table all_leads add column if not exists lease_expires_at timestamptz;
+alter table all_leads add column if not exists scrape_attempts int not null default 0;
+
+create index if not exists all_leads_claimable_idx on all_leads (scrape_status, lease_expires_at) where scraped = false;
+
+-- Atomically claim up to p_batch unscraped leads that are pending or whose lease expired.
+-- SKIP LOCKED lets any number of scrapers claim concurrently without ever getting the same row.
+-- Every claim counts as an attempt, so a profile that keeps failing stops being handed out.
+create or replace function claim_scrape_urls(p_worker text, p_batch int, p_lease_seconds int,
+                                             p_tags text[] default null, p_max_attempts int default 3)
+returns table (lead_id text, linkedin_url text)
+language sql as $$
+    update all_leads a
+    set scrape_status = 'in_progress',
+        lease_owner = p_worker,
+        lease_expires_at = now() + make_interval(secs => p_lease_seconds),
+        scrape_attempts = a.scrape_attempts + 1
+    where a.lead_id in (
+        select c.lead_id from all_leads c
+        where c.scraped = false
+          and (c.scrape_status = 'pending' or (c.scrape_status = 'in_progress' and c.lease_expires_at < now()))
+          and c.scrape_attempts < p_max_attempts
+          and (p_tags is null or c.tag = any(p_tags))
+        order by c.lead_id
+        limit p_batch
+        for update skip locked
+    )
+    returning a.lead_id, a.linkedin_url;
+$$;
+
+-- Extend every lease this worker still holds.
+create or replace function heartbeat_scrape_leases(p_worker text, p_lease_seconds int)
+returns int
+language sql as $$
+    with renewed as (
+        update all_leads
+        set lease_expires_at = now() + make_interval(secs => p_lease_seconds)
+        where lease_owner = p_worker and scrape_status = 'in_progress'
+        returning 1
+    )
+    select count(*)::int from renewed;
+$$;
+
+-- Finish leases: 'done' for scraped leads, back to 'pending' for ones this worker gave up on.
+create or replace function finish_scrape_leases(p_worker text, p_lead_ids text[], p_status text)
+returns int
+language sql as $$
+    with finished as (
+        update all_leads
+        set scrape_status = p_status, lease_owner = null, lease_expires_at = null
+        where lease_owner = p_worker and lead_id = any(p_lead_ids)
+        returning 1
+    )
+    select count(*)::int from finished;
+$$;
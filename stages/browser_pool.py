@@ -0,0 +1,245 @@
+import os
+import time
+import logging
+import threading
+import statistics
+from collections import deque
+from typing import Dict, List, Optional
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from dotenv import load_dotenv
+
+from stages.page_weight import apply_block_profile, enable_page_timings
+
+try:
+    import psutil
+except ImportError:  # Optional: without it drivers are recycled on page-load latency only
+    psutil = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+
+def create_driver(headless: bool = False, block_profile: str = "off"):
+    """Chrome with the anti-detection options used by every stage, and the block profile applied"""
+    chrome_options = Options()
+
+    # Anti-detection measures
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+    if headless:
+        chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--window-size=1366,900")
+
+    driver = webdriver.Chrome(options=chrome_options)
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    enable_page_timings(driver)
+    if block_profile != "off":
+        apply_block_profile(driver, block_profile)
+    return driver
+
+
+def driver_rss_mb(driver) -> Optional[float]:
+    """Resident memory of chromedriver plus every Chrome process under it, None without psutil"""
+    if psutil is None:
+        return None
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        return sum(p.memory_info().rss for p in [root] + root.children(recursive=True)) / (1024 * 1024)
+    except Exception:
+        return None
+
+
+class PooledDriver:
+    """A Chrome instance plus what the pool knows about it"""
+
+    def __init__(self, driver, account: str, latency_window: int):
+        self.driver = driver
+        self.account = account
+        self.created = time.monotonic()
+        self.last_used = self.created
+        self.pages = 0
+        self.load_times = deque(maxlen=latency_window)
+        self.logged_in = False
+        self.cold = True
+        self.acquired_at = self.created
+        self.block_profile = "off"
+
+
+class BrowserPool:
+    """
+    Keeps logged-in Chrome instances warm across runs and threads, one or more per account.
+
+    acquire() hands out an idle driver of the same account when there is one (no launch,
+    no login), otherwise launches a new one. Drivers are recycled when Chrome's memory
+    (RSS) or the median page-load time of the last pages crosses a threshold, instead of
+    after a fixed number of pages. Idle drivers beyond max_idle or idle_ttl are closed.
+    Every driver handed out has the pool's current block_profile (see page_weight).
+    """
+
+    def __init__(self, headless: bool = False, block_profile: str = "light", max_rss_mb: float = 1500,
+                 max_page_load_seconds: float = 15, latency_window: int = 10, max_idle: int = 4,
+                 idle_ttl: float = 1800, driver_factory=None):
+        self.headless = headless
+        self.block_profile = block_profile
+        self.max_rss_mb = max_rss_mb
+        self.max_page_load_seconds = max_page_load_seconds
+        self.latency_window = latency_window
+        self.max_idle = max_idle
+        self.idle_ttl = idle_ttl
+        self.driver_factory = driver_factory or create_driver
+        self._idle: List[PooledDriver] = []
+        self._lock = threading.Lock()
+        self._metrics = {"launches": 0, "reuses": 0, "recycled": 0, "startup_seconds": 0.0, "cold_starts_timed": 0}
+        self._recycle_reasons: Dict[str, int] = {}
+
+    def acquire(self, account: str) -> PooledDriver:
+        self._reap()
+        with self._lock:
+            idle = [b for b in self._idle if b.account == account]
+            browser = idle[-1] if idle else None
+            if browser:
+                self._idle.remove(browser)
+        if browser and self._alive(browser):
+            browser.cold = False
+            browser.acquired_at = time.monotonic()
+            if browser.block_profile != self.block_profile:
+                # Blocking is a live DevTools setting, a warm browser can switch profiles
+                apply_block_profile(browser.driver, self.block_profile)
+                browser.block_profile = self.block_profile
+            with self._lock:
+                self._metrics["reuses"] += 1
+            logger.info(f"Reusing warm browser for {account} ({browser.pages} pages so far)")
+            return browser
+        if browser:
+            self._quit(browser)
+
+        launch_started = time.monotonic()
+        driver = self.driver_factory(headless=self.headless, block_profile=self.block_profile)
+        browser = PooledDriver(driver, account, self.latency_window)
+        browser.acquired_at = launch_started
+        browser.block_profile = self.block_profile
+        with self._lock:
+            self._metrics["launches"] += 1
+        return browser
+
+    def ready(self, browser: PooledDriver):
+        """Call once the browser is logged in; times cold starts (launch + login)"""
+        browser.logged_in = True
+        if browser.cold:
+            with self._lock:
+                self._metrics["startup_seconds"] += time.monotonic() - browser.acquired_at
+                self._metrics["cold_starts_timed"] += 1
+            browser.cold = False
+
+    def record_page_load(self, browser: PooledDriver, seconds: float):
+        browser.pages += 1
+        browser.last_used = time.monotonic()
+        browser.load_times.append(seconds)
+
+    def recycle_reason(self, browser: PooledDriver) -> Optional[str]:
+        """Why this driver should be replaced now, or None while it is healthy"""
+        rss = driver_rss_mb(browser.driver)
+        if rss is not None and rss > self.max_rss_mb:
+            return f"rss: {rss:.0f} MB > {self.max_rss_mb:.0f} MB"
+        if len(browser.load_times) >= min(5, self.latency_window):
+            median = statistics.median(browser.load_times)
+            if median > self.max_page_load_seconds:
+                return f"latency: median page load {median:.1f}s > {self.max_page_load_seconds:.1f}s"
+        return None
+
+    def recycle(self, browser: PooledDriver, reason: str) -> PooledDriver:
+        """Quit a driver and launch a fresh (logged-out) one for the same account"""
+        logger.info(f"Recycling browser for {browser.account} after {browser.pages} pages: {reason}")
+        with self._lock:
+            self._metrics["recycled"] += 1
+            key = reason.split(":")[0]
+            self._recycle_reasons[key] = self._recycle_reasons.get(key, 0) + 1
+        self._quit(browser)
+        return self.acquire(browser.account)
+
+    def release(self, browser: PooledDriver, keep: bool = True):
+        """Return a driver for reuse (closed instead when keep=False, logged out or due for recycling)"""
+        if not keep or not browser.logged_in:
+            self._quit(browser)
+            return
+        reason = self.recycle_reason(browser)
+        if reason:
+            logger.info(f"Not keeping browser for {browser.account}: {reason}")
+            with self._lock:
+                self._metrics["recycled"] += 1
+            self._quit(browser)
+            return
+        browser.last_used = time.monotonic()
+        with self._lock:
+            self._idle.append(browser)
+            overflow = self._idle[:-self.max_idle] if len(self._idle) > self.max_idle else []
+            self._idle = self._idle[len(overflow):]
+        for old in overflow:
+            self._quit(old)
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            m = dict(self._metrics)
+            m["recycle_reasons"] = dict(self._recycle_reasons)
+            m["idle"] = len(self._idle)
+        avg_startup = m["startup_seconds"] / m["cold_starts_timed"] if m["cold_starts_timed"] else 0.0
+        m["avg_startup_seconds"] = round(avg_startup, 1)
+        m["startup_seconds_saved"] = round(m["reuses"] * avg_startup, 1)
+        m["startup_seconds"] = round(m["startup_seconds"], 1)
+        return m
+
+    def shutdown(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for browser in idle:
+            self._quit(browser)
+
+    def _reap(self):
+        now = time.monotonic()
+        with self._lock:
+            stale = [b for b in self._idle if now - b.last_used > self.idle_ttl]
+            self._idle = [b for b in self._idle if b not in stale]
+        for browser in stale:
+            self._quit(browser)
+
+    @staticmethod
+    def _alive(browser: PooledDriver) -> bool:
+        try:
+            browser.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(browser: PooledDriver):
+        try:
+            browser.driver.quit()
+            logger.info(f"Browser for {browser.account} closed")
+        except Exception:
+            pass
+
+
+_browser_pool = None
+_browser_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """Process-wide pool shared by stage 1 and stage 2 (Streamlit reruns and pipeline threads)"""
+    global _browser_pool
+    with _browser_pool_lock:
+        if _browser_pool is None:
+            _browser_pool = BrowserPool(
+                headless=os.getenv("BROWSER_HEADLESS", "").lower() in ("1", "true", "yes"),
+                block_profile=os.getenv("BROWSER_BLOCK_PROFILE", "light"),
+                max_rss_mb=float(os.getenv("BROWSER_MAX_RSS_MB", "1500")),
+                max_page_load_seconds=float(os.getenv("BROWSER_MAX_PAGE_LOAD_SECONDS", "15")),
+                max_idle=int(os.getenv("BROWSER_MAX_IDLE", "4")),
+            )
+    return _browser_pool
@@ -0,0 +1,324 @@
+import os
+import json
+import time
+import queue
+import logging
+import threading
+from typing import Callable, Iterable, List, Dict, Any, Optional
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# PostgREST puts in_() filters in the URL, so keep id chunks well under URL length limits
+UPSERT_CHUNK_SIZE = 500
+IN_FILTER_CHUNK_SIZE = 200
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterable[list]:
+    """Yield consecutive lists of at most size items"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _new_report(table: str) -> Dict:
+    return {"table": table, "rows": 0, "requests": 0, "written": 0, "written_ids": [], "errors": []}
+
+
+def bulk_upsert(client, table: str, rows: List[Dict], on_conflict: str = "lead_id",
+                chunk_size: int = UPSERT_CHUNK_SIZE, ignore_duplicates: bool = False, id_column: str = "lead_id") -> Dict:
+    """
+    Upsert rows in chunks, one request per chunk.
+
+    A failing chunk is logged and reported but does not stop the remaining chunks.
+
+    Returns:
+        dict: table, rows, requests, written (rows the server returned),
+              written_ids (their id_column values) and
+              errors: list of {"chunk", "ids", "error"} per failed chunk
+    """
+    report = _new_report(table)
+    for chunk_idx, chunk in enumerate(chunked(rows, chunk_size)):
+        report["rows"] += len(chunk)
+        report["requests"] += 1
+        try:
+            response = (
+                client.table(table)
+                .upsert(chunk, on_conflict=on_conflict, ignore_duplicates=ignore_duplicates)
+                .execute()
+            )
+            report["written"] += len(response.data or [])
+            report["written_ids"].extend(row.get(id_column) for row in (response.data or []))
+        except Exception as e:
+            ids = [row.get(id_column) for row in chunk]
+            logger.error(f"Upsert into {table} failed for chunk {chunk_idx} ({len(chunk)} rows): {e}")
+            report["errors"].append({"chunk": chunk_idx, "ids": ids, "error": str(e)})
+    return report
+
+
+def bulk_update_in(client, table: str, values: Dict, column: str, ids: List[Any],
+                   chunk_size: int = IN_FILTER_CHUNK_SIZE) -> Dict:
+    """
+    Apply the same update to every row whose column is in ids, one request per chunk of ids.
+
+    Returns:
+        dict: same shape as bulk_upsert's report
+    """
+    report = _new_report(table)
+    unique_ids = list(dict.fromkeys(i for i in ids if i is not None))
+    for chunk_idx, chunk in enumerate(chunked(unique_ids, chunk_size)):
+        report["rows"] += len(chunk)
+        report["requests"] += 1
+        try:
+            response = client.table(table).update(values).in_(column, chunk).execute()
+            report["written"] += len(response.data or [])
+        except Exception as e:
+            logger.error(f"Update of {table} failed for chunk {chunk_idx} ({len(chunk)} ids): {e}")
+            report["errors"].append({"chunk": chunk_idx, "ids": chunk, "error": str(e)})
+    return report
+
+
+def save_scored_leads(client, results: List[Dict], chunk_size: int = UPSERT_CHUNK_SIZE) -> List[Dict]:
+    """
+    Persist tab 3 results: bulk upsert into llm_response, then mark the leads
+    whose rows were written as sent_to_llm in lead_details.
+
+    Returns:
+        list: the two write reports (llm_response, lead_details)
+    """
+    upsert_report = bulk_upsert(client, "llm_response", results, on_conflict="lead_id", chunk_size=chunk_size)
+    failed_ids = {lead_id for err in upsert_report["errors"] for lead_id in err["ids"]}
+    saved_ids = [row["lead_id"] for row in results if row.get("lead_id") not in failed_ids]
+    update_report = bulk_update_in(client, "lead_details", {"sent_to_llm": True}, "lead_id", saved_ids)
+    return [upsert_report, update_report]
+
+
+def save_messages(client, messages: List[Dict], chunk_size: int = UPSERT_CHUNK_SIZE) -> List[Dict]:
+    """
+    Persist tab 5 results: bulk upsert into message, then mark the leads whose
+    rows were written as message_generated='yes' in llm_response.
+
+    Returns:
+        list: the two write reports (message, llm_response)
+    """
+    upsert_report = bulk_upsert(client, "message", messages, on_conflict="lead_id", chunk_size=chunk_size)
+    failed_ids = {lead_id for err in upsert_report["errors"] for lead_id in err["ids"]}
+    saved_ids = [row["lead_id"] for row in messages if row.get("lead_id") not in failed_ids]
+    update_report = bulk_update_in(client, "llm_response", {"message_generated": 'yes'}, "lead_id", saved_ids)
+    return [upsert_report, update_report]
+
+
+def ingest_leads(client, leads: List[Dict], chunk_size: int = UPSERT_CHUNK_SIZE) -> Dict:
+    """
+    Insert scouted leads into all_leads, skipping lead_ids that are already there.
+
+    Uses upsert with ON CONFLICT DO NOTHING, so re-running a harvest is safe and
+    costs one request per chunk instead of one per lead.
+
+    Returns:
+        dict: inserted, inserted_ids, already_known, failed, requests and per-chunk errors
+    """
+    report = bulk_upsert(client, "all_leads", leads, on_conflict="lead_id", chunk_size=chunk_size, ignore_duplicates=True)
+    failed = sum(len(err["ids"]) for err in report["errors"])
+    return {
+        "inserted": report["written"],
+        "inserted_ids": report["written_ids"],
+        "already_known": report["rows"] - report["written"] - failed,
+        "failed": failed,
+        "requests": report["requests"],
+        "errors": report["errors"],
+    }
+
+
+def save_scraped_profiles(client, profiles: List[Dict], chunk_size: int = UPSERT_CHUNK_SIZE) -> List[Dict]:
+    """
+    Persist stage 2 results: bulk upsert into lead_details (idempotent, so WAL
+    replays are safe), then mark the written leads as scraped in all_leads.
+
+    Returns:
+        list: the two write reports (lead_details, all_leads)
+    """
+    upsert_report = bulk_upsert(client, "lead_details", profiles, on_conflict="lead_id", chunk_size=chunk_size)
+    failed_ids = {lead_id for err in upsert_report["errors"] for lead_id in err["ids"]}
+    saved_ids = [row["lead_id"] for row in profiles if row.get("lead_id") not in failed_ids]
+    update_report = bulk_update_in(client, "all_leads", {"scraped": True}, "lead_id", saved_ids)
+    return [upsert_report, update_report]
+
+
+class WriteAheadLog:
+    """
+    Append-only JSON-lines spill file for rows that are not yet in the database.
+
+    Every row is appended (and fsynced) before it is queued for writing, and acked
+    once the write succeeded. Rows without an ack are returned by pending() and
+    get replayed on the next start.
+    """
+
+    def __init__(self, path: str, compact_every: int = 1000):
+        self.path = path
+        self.compact_every = compact_every
+        self._acks_since_compact = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def _append(self, entries: List[Dict]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append(self, key: str, row: Dict):
+        with self._lock:
+            self._append([{"op": "put", "key": key, "row": row}])
+
+    def ack(self, keys: List[str]):
+        if not keys:
+            return
+        with self._lock:
+            self._append([{"op": "ack", "keys": list(keys)}])
+            self._acks_since_compact += len(keys)
+            if self._acks_since_compact >= self.compact_every:
+                self._compact()
+
+    def _read_pending(self) -> Dict[str, Dict]:
+        pending = {}
+        if not os.path.exists(self.path):
+            return pending
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A crash can leave a torn last line; everything before it is intact
+                    continue
+                if entry.get("op") == "put":
+                    pending[entry["key"]] = entry["row"]
+                elif entry.get("op") == "ack":
+                    for key in entry.get("keys", []):
+                        pending.pop(key, None)
+        return pending
+
+    def _compact(self):
+        pending = self._read_pending()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for key, row in pending.items():
+                f.write(json.dumps({"op": "put", "key": key, "row": row}, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._acks_since_compact = 0
+
+    def pending(self) -> List[Dict]:
+        """Rows appended but never acked (and compact the file down to them)"""
+        with self._lock:
+            rows = list(self._read_pending().values())
+            if os.path.exists(self.path):
+                self._compact()
+        return rows
+
+
+_STOP = object()
+_FLUSH = object()
+
+
+class BatchWriter:
+    """
+    Background thread that writes rows while the producer keeps working.
+
+    Rows are flushed through flush_fn(rows) -> list of write reports whenever
+    batch_size rows are waiting or flush_interval seconds have passed. The queue
+    is bounded, so put() blocks (backpressure) if the database falls behind, and
+    a crash loses at most the rows not yet flushed.
+    """
+
+    def __init__(self, flush_fn: Callable[[List[Dict]], List[Dict]], batch_size: int = 50,
+                 flush_interval: float = 2.0, max_queue: int = 500, name: str = "batch-writer"):
+        self.flush_fn = flush_fn
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.reports = []
+        self.flushed_rows = 0
+        self.failed_rows = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, row: Dict, timeout: Optional[float] = None):
+        """Queue a row for writing; blocks while the queue is full"""
+        self.queue.put(row, timeout=timeout)
+
+    def flush(self):
+        """Write everything queued so far and wait until it is done"""
+        self.queue.put(_FLUSH)
+        self.queue.join()
+
+    def close(self, timeout: Optional[float] = None) -> List[Dict]:
+        """Flush everything still queued, stop the thread and return all write reports"""
+        self.queue.put(_STOP)
+        self._thread.join(timeout)
+        with self._lock:
+            return list(self.reports)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def errors(self) -> List[Dict]:
+        with self._lock:
+            return [dict(err, table=report["table"]) for report in self.reports for err in report["errors"]]
+
+    def _flush(self, rows: List[Dict]):
+        try:
+            reports = self.flush_fn(rows)
+        except Exception as e:
+            logger.error(f"Batch write of {len(rows)} rows failed: {e}")
+            reports = [{"table": "?", "rows": len(rows), "requests": 0, "written": 0,
+                        "errors": [{"chunk": 0, "ids": [row.get("lead_id") for row in rows], "error": str(e)}]}]
+        # The first report is the primary table; later ones are follow-up flag updates
+        failed = {lead_id for report in reports[:1] for err in report["errors"] for lead_id in err["ids"]}
+        with self._lock:
+            self.reports.extend(reports)
+            self.flushed_rows += len(rows) - len(failed)
+            self.failed_rows += len(failed)
+
+    def _run(self):
+        pending = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            is_marker = item is _STOP or item is _FLUSH
+            if item is not None and not is_marker:
+                pending.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            due = deadline is not None and time.monotonic() >= deadline
+            if pending and (is_marker or len(pending) >= self.batch_size or due):
+                self._flush(pending)
+                # Rows only count as done for queue.join() once they are written
+                for _ in pending:
+                    self.queue.task_done()
+                pending = []
+                deadline = None
+            if is_marker:
+                self.queue.task_done()
+            if item is _STOP:
+                return
@@ -0,0 +1,170 @@
+import os
+import math
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+from typing import Dict, Iterable, Optional, Set
+from dotenv import load_dotenv
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# Kinds of keys kept in the index
+LEAD, POST = "lead", "post"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (no false negatives, ~error_rate false positives)"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = max(capacity, 1000)
+        self.size = int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class DedupeIndex:
+    """
+    What earlier scouting runs already collected: lead_ids and harvested post URNs,
+    plus each post's last reaction count and reactor set for delta harvesting.
+
+    The exact set lives in SQLite; at load time it is read once into a Bloom filter
+    per kind, so the common "never seen" answer costs no disk access. Only Bloom
+    hits are confirmed against SQLite.
+    """
+
+    def __init__(self, path: str = ".cache/dedupe_index.sqlite3", error_rate: float = 0.001):
+        self.path = path
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._blooms: Dict[str, BloomFilter] = {}
+        self.lookups = 0
+        self.hits = 0
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen ("
+            " kind TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " first_seen REAL NOT NULL,"
+            " PRIMARY KEY (kind, key)) WITHOUT ROWID"
+        )
+        # Per harvested post: the reaction count last seen and who had reacted by then
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS post_reactions ("
+            " urn TEXT PRIMARY KEY,"
+            " reactions INTEGER,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS post_reactors ("
+            " urn TEXT NOT NULL,"
+            " lead_id TEXT NOT NULL,"
+            " PRIMARY KEY (urn, lead_id)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+        for kind in (LEAD, POST):
+            self._load_bloom(kind)
+
+    def _load_bloom(self, kind: str):
+        total = self._conn.execute("SELECT COUNT(*) FROM seen WHERE kind = ?", (kind,)).fetchone()[0]
+        bloom = BloomFilter(capacity=total * 2, error_rate=self.error_rate)
+        for (key,) in self._conn.execute("SELECT key FROM seen WHERE kind = ?", (kind,)):
+            bloom.add(key)
+        self._blooms[kind] = bloom
+        logger.info(f"Dedupe index: {total} known {kind}s")
+
+    def contains(self, kind: str, key: str) -> bool:
+        if not key:
+            return False
+        with self._lock:
+            self.lookups += 1
+            if key not in self._blooms[kind]:
+                return False
+            found = self._conn.execute("SELECT 1 FROM seen WHERE kind = ? AND key = ?", (kind, key)).fetchone() is not None
+            self.hits += found
+            return found
+
+    def add(self, kind: str, keys: Iterable[str]):
+        keys = [key for key in keys if key]
+        if not keys:
+            return
+        now = time.time()
+        with self._lock:
+            inserted = self._conn.executemany(
+                "INSERT OR IGNORE INTO seen (kind, key, first_seen) VALUES (?, ?, ?)", [(kind, key, now) for key in keys]
+            ).rowcount
+            self._conn.commit()
+            bloom = self._blooms[kind]
+            for key in keys:
+                bloom.add(key)
+            if bloom.count > bloom.capacity:
+                # Past capacity the false-positive rate climbs; rebuild twice as large
+                self._load_bloom(kind)
+        logger.debug(f"Dedupe index: {inserted} new {kind}s")
+
+    def reaction_count(self, urn: str) -> Optional[int]:
+        """Reactions the post had when it was last harvested (None: unknown or never harvested)"""
+        with self._lock:
+            row = self._conn.execute("SELECT reactions FROM post_reactions WHERE urn = ?", (urn,)).fetchone()
+        return row[0] if row else None
+
+    def post_reactors(self, urn: str) -> Set[str]:
+        with self._lock:
+            return {lead_id for (lead_id,) in self._conn.execute("SELECT lead_id FROM post_reactors WHERE urn = ?", (urn,))}
+
+    def record_post(self, urn: str, reactions: Optional[int], lead_ids: Iterable[str]):
+        """Remember a harvested post with its reaction count and the reactors seen (added to earlier ones)"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO post_reactions (urn, reactions, updated_at) VALUES (?, ?, ?)"
+                " ON CONFLICT(urn) DO UPDATE SET reactions = excluded.reactions, updated_at = excluded.updated_at",
+                (urn, reactions, time.time())
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO post_reactors (urn, lead_id) VALUES (?, ?)", [(urn, lead_id) for lead_id in lead_ids if lead_id]
+            )
+            self._conn.commit()
+        self.add(POST, [urn])
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT kind, COUNT(*) FROM seen GROUP BY kind").fetchall())
+        return {"known_leads": counts.get(LEAD, 0), "known_posts": counts.get(POST, 0),
+                "lookups": self.lookups, "hits": self.hits}
+
+
+_dedupe_index = None
+_dedupe_index_lock = threading.Lock()
+
+
+def get_dedupe_index() -> DedupeIndex:
+    """Process-wide index, loaded once per run"""
+    global _dedupe_index
+    with _dedupe_index_lock:
+        if _dedupe_index is None:
+            _dedupe_index = DedupeIndex(path=os.getenv("DEDUPE_INDEX_PATH", ".cache/dedupe_index.sqlite3"))
+    return _dedupe_index
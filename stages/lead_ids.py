@@ -0,0 +1,23 @@
+from typing import Optional
+from urllib.parse import urlsplit
+
+
+def canonical_lead_id(linkedin_url: str) -> Optional[str]:
+    """
+    Lead id used as the key in all_leads / lead_details: the path segment after /in/.
+
+    Query strings, fragments and trailing slashes are dropped. The segment is kept
+    as it appears in the URL (percent-encoding included) so ids match the rows
+    written before this helper existed. Case is kept because reactor links use
+    case-sensitive member ids (e.g. /in/ACoAAA4iA5o...).
+    """
+    if not linkedin_url or '/in/' not in linkedin_url:
+        return None
+    path = urlsplit(linkedin_url.strip()).path
+    parts = [part for part in path.split('/') if part]
+    if 'in' not in parts:
+        return None
+    idx = parts.index('in')
+    if idx + 1 >= len(parts):
+        return None
+    return parts[idx + 1]
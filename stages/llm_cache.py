@@ -0,0 +1,127 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+from typing import Optional
+from dotenv import load_dotenv
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+
+class LLMCache:
+    """
+    Local SQLite cache of parsed Gemini results.
+
+    Entries are content-addressed: the key is a hash of everything that decides the
+    answer (model, prompt template version, WildnetEdge text and the lead itself),
+    so re-running a tab on the same leads never pays Gemini twice.
+    """
+
+    def __init__(self, path: str = ".cache/llm_cache.sqlite3", max_entries: int = 50000,
+                 max_age_days: float = 30, evict_every: int = 200):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_days * 24 * 3600
+        self.evict_every = evict_every
+        self.hits = 0
+        self.misses = 0
+        self._puts_since_evict = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY,"
+            " kind TEXT,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_used_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache(last_used_at)")
+        self._conn.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(model: str, prompt_version: str, context: str, lead_info: dict) -> str:
+        """Hash model, prompt template version, context text and the canonicalized lead"""
+        canonical_lead = json.dumps(lead_info, sort_keys=True, default=str, separators=(",", ":"))
+        digest = hashlib.sha256()
+        for part in (model, prompt_version, hashlib.sha256(context.encode("utf-8")).hexdigest(), canonical_lead):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.max_age_seconds:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_used_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, value: dict, kind: str = ""):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, kind, value, created_at, last_used_at) VALUES (?, ?, ?, ?, ?)",
+                (key, kind, json.dumps(value, default=str), now, now)
+            )
+            self._conn.commit()
+            self._puts_since_evict += 1
+            should_evict = self._puts_since_evict >= self.evict_every
+        if should_evict:
+            self.evict()
+
+    def evict(self):
+        """Drop entries older than max_age, then least recently used ones above max_entries"""
+        with self._lock:
+            self._puts_since_evict = 0
+            expired = self._conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.max_age_seconds,)
+            ).rowcount
+            overflow = self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                " SELECT key FROM llm_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+            self._conn.commit()
+        if expired or overflow:
+            logger.info(f"LLM cache evicted {expired} expired and {overflow} overflow entries")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """Process-wide cache shared by the lead evaluator and message writer"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = LLMCache(
+                path=os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite3"),
+                max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000")),
+                max_age_days=float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "30")),
+            )
+    return _shared_cache
@@ -0,0 +1,88 @@
+import time
+import threading
+import logging
+import concurrent.futures
+from typing import Callable, Iterator, List, Tuple, Any
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Spread calls for one API key evenly so we never exceed requests_per_minute"""
+
+    def __init__(self, requests_per_minute: int = 0):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until the next request slot for this key is free"""
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def run_per_key(task: Callable[[Any, str], Any], api_keys: List[str], items_per_key: List[list],
+                max_concurrency_per_key: int = 4, requests_per_minute: int = 0, pass_limiter: bool = False
+                ) -> Iterator[Tuple[int, Any, Any, Exception]]:
+    """
+    Run task(item, api_key) for every item, all API keys in parallel.
+
+    Each key gets its own thread pool (max_concurrency_per_key workers) and its own
+    rate limiter, so one key being throttled never slows down the others.
+
+    Args:
+        task: Function called as task(item, api_key)
+        api_keys: One Gemini API key per account
+        items_per_key: items_per_key[i] is the work assigned to api_keys[i]
+        max_concurrency_per_key: Max in-flight calls per key
+        requests_per_minute: Max calls started per minute per key (0 = no limit)
+        pass_limiter: Call task(item, api_key, limiter=...) so a task that makes more
+                      than one call can take a slot for each extra call
+
+    Yields:
+        (key_index, item, result, error) as soon as each call completes, so the
+        caller (Streamlit main thread) can update progress and tables.
+    """
+    executors = []
+    futures = {}
+
+    def _limited(limiter, item, api_key):
+        limiter.acquire()
+        if pass_limiter:
+            return task(item, api_key, limiter=limiter)
+        return task(item, api_key)
+
+    try:
+        for key_idx, (api_key, items) in enumerate(zip(api_keys, items_per_key)):
+            if not items:
+                continue
+            executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(1, max_concurrency_per_key),
+                thread_name_prefix=f"gemini-key-{key_idx + 1}"
+            )
+            executors.append(executor)
+            limiter = RateLimiter(requests_per_minute)
+            for item in items:
+                future = executor.submit(_limited, limiter, item, api_key)
+                futures[future] = (key_idx, item)
+
+        for future in concurrent.futures.as_completed(futures):
+            key_idx, item = futures[future]
+            try:
+                yield key_idx, item, future.result(), None
+            except Exception as e:
+                logger.warning(f"Task failed for Gemini Account #{key_idx + 1}: {e}")
+                yield key_idx, item, None, e
+    finally:
+        # Cancel anything still queued if the caller stops early (e.g. Streamlit rerun)
+        for executor in executors:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,106 @@
+import time
+import hashlib
+import threading
+from typing import List, Dict, Tuple
+
+# api_key_id of rows answered from the local LLM cache
+CACHE_HIT_KEY_ID = "cache"
+
+# USD per 1M tokens (input, output) used for the cost estimate shown in the UI
+PRICING_PER_MILLION_TOKENS = {
+    "models/gemini-2.5-flash": (0.30, 2.50),
+}
+
+
+def key_label(api_key: str) -> str:
+    """Short, non-secret label for an API key (what we store and show instead of the key)"""
+    if not api_key:
+        return "unknown"
+    fingerprint = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:6]
+    return f"…{api_key[-4:]} ({fingerprint})"
+
+
+def usage_from_response(response) -> Tuple[int, int]:
+    """Read (input_tokens, output_tokens) from a chat model response, 0 when not reported"""
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage:
+        return int(usage.get("input_tokens") or 0), int(usage.get("output_tokens") or 0)
+    # Older langchain-google-genai versions only put Gemini's own counters in response_metadata
+    usage = (getattr(response, "response_metadata", None) or {}).get("usage_metadata") or {}
+    return int(usage.get("prompt_token_count") or 0), int(usage.get("candidates_token_count") or 0)
+
+
+def as_cache_hit(result: Dict) -> Dict:
+    """A cached result as a new row: the original call's tokens and latency were not spent again"""
+    return dict(result, input_tokens=0, output_tokens=0, latency_ms=0, api_key_id=CACHE_HIT_KEY_ID)
+
+
+def split_tokens(total: int, parts: int) -> List[int]:
+    """Share a batch call's tokens across its leads so per-lead rows still add up"""
+    if parts <= 0:
+        return []
+    share, remainder = divmod(total, parts)
+    return [share + (1 if i < remainder else 0) for i in range(parts)]
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    input_price, output_price = PRICING_PER_MILLION_TOKENS.get(model, (0.0, 0.0))
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+class UsageTracker:
+    """Collects tokens and latency of every Gemini call made during one run"""
+
+    def __init__(self):
+        self.calls = []
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def record(self, api_key_id: str, model: str, input_tokens: int, output_tokens: int, latency_ms: float, leads: int = 1):
+        with self._lock:
+            self.calls.append({
+                "api_key_id": api_key_id,
+                "model": model,
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "latency_ms": latency_ms,
+                "leads": leads,
+            })
+
+    def summary(self) -> List[Dict]:
+        """One row per API key plus a TOTAL row, ready for st.dataframe"""
+        with self._lock:
+            calls = list(self.calls)
+        wall_seconds = max(time.time() - self.started, 1e-6)
+
+        groups = {}
+        for call in calls:
+            groups.setdefault(call["api_key_id"], []).append(call)
+        if calls:
+            groups["TOTAL"] = calls
+
+        rows = []
+        for api_key_id, group in groups.items():
+            input_tokens = sum(c["input_tokens"] for c in group)
+            output_tokens = sum(c["output_tokens"] for c in group)
+            latencies = [c["latency_ms"] for c in group]
+            rows.append({
+                "api_key": api_key_id,
+                "calls": len(group),
+                "leads": sum(c["leads"] for c in group),
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "tokens_per_sec": round((input_tokens + output_tokens) / wall_seconds, 1),
+                "p50_latency_ms": round(_percentile(latencies, 50)),
+                "p95_latency_ms": round(_percentile(latencies, 95)),
+                "est_cost_usd": round(sum(estimate_cost(c["model"], c["input_tokens"], c["output_tokens"]) for c in group), 4),
+            })
+        return rows
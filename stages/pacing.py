@@ -0,0 +1,201 @@
+import os
+import json
+import time
+import random
+import hashlib
+import logging
+import datetime
+import threading
+from contextlib import contextmanager
+from collections import deque
+from typing import Callable, Dict, List
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:  # Windows: the daily cap then only holds within one process
+    fcntl = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# ~22s between profile starts, page load included: the 20-25s per profile of the fixed delays this replaced
+DEFAULT_TARGET_PER_HOUR = float(os.getenv("PACING_TARGET_PER_HOUR", "160"))
+DEFAULT_DAILY_CAP = int(os.getenv("PACING_DAILY_CAP", "400"))
+CHECKPOINT_COOLDOWN_SECONDS = float(os.getenv("PACING_CHECKPOINT_COOLDOWN", "900"))
+
+# Outcomes reported back by the scraper after every profile
+OK, EMPTY, ERROR, CHECKPOINT = "ok", "empty", "error", "checkpoint"
+
+
+class AccountPacer:
+    """
+    Paces profile visits for one LinkedIn account.
+
+    Visits are spread over the current rate (profiles per hour, with jitter so
+    the gaps do not look machine-made). The rate follows AIMD: every healthy
+    profile adds a little back toward target_per_hour, while warning signs cut
+    it multiplicatively: empty profile cards (soft blocks), error bursts and,
+    hardest, checkpoint/authwall redirects, which also pause the account for a
+    cooldown. Visits per calendar day are persisted and re-read under a file
+    lock before every visit, so daily_cap holds across runs, threads and
+    processes (e.g. the Streamlit app and pipeline.py) sharing the account.
+    """
+
+    def __init__(self, account: str, target_per_hour: float = DEFAULT_TARGET_PER_HOUR,
+                 daily_cap: int = DEFAULT_DAILY_CAP, min_per_hour: float = 6, jitter: float = 0.35,
+                 state_dir: str = ".cache/pacing"):
+        self.account = account
+        self.target_per_hour = target_per_hour
+        self.daily_cap = daily_cap
+        self.min_per_hour = min(min_per_hour, target_per_hour)
+        self.jitter = jitter
+        self.rate = target_per_hour
+        self.signals = {OK: 0, EMPTY: 0, ERROR: 0, CHECKPOINT: 0}
+        self._recent = deque(maxlen=10)
+        self._next_slot = 0.0
+        self._cooldown_until = 0.0
+        self._lock = threading.Lock()
+
+        os.makedirs(state_dir, exist_ok=True)
+        digest = hashlib.sha1(str(account).encode("utf-8")).hexdigest()[:12]
+        self._state_path = os.path.join(state_dir, f"{digest}.json")
+        self._lock_path = self._state_path + ".lock"
+        self._visits = self._load_visits()
+
+    def _load_visits(self) -> Dict[str, int]:
+        try:
+            with open(self._state_path, "r") as f:
+                return json.load(f).get("visits", {})
+        except (OSError, ValueError):
+            return {}
+
+    def _save_visits(self):
+        today = datetime.date.today().isoformat()
+        # Only today matters for the cap; keep a week for the stats
+        cutoff = (datetime.date.today() - datetime.timedelta(days=7)).isoformat()
+        self._visits = {day: n for day, n in self._visits.items() if day >= cutoff}
+        tmp_path = self._state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"account": self.account, "visits": self._visits, "updated": today}, f)
+        os.replace(tmp_path, self._state_path)
+
+    @contextmanager
+    def _shared_visits(self):
+        """Hold the account's file lock with the visit counts fresh from disk"""
+        with open(self._lock_path, "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._visits = self._load_visits()
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @property
+    def visits_today(self) -> int:
+        return self._visits.get(datetime.date.today().isoformat(), 0)
+
+    def wait(self) -> bool:
+        """
+        Block until this account may open the next profile.
+
+        Returns:
+            bool: False when the daily cap is reached (the caller should stop)
+        """
+        with self._lock, self._shared_visits():
+            if self.visits_today >= self.daily_cap:
+                return False
+            now = time.monotonic()
+            slot = max(now, self._next_slot, self._cooldown_until)
+            interval = 3600.0 / self.rate * random.uniform(1 - self.jitter, 1 + self.jitter)
+            self._next_slot = slot + interval
+            today = datetime.date.today().isoformat()
+            self._visits[today] = self._visits.get(today, 0) + 1
+            self._save_visits()
+        delay = slot - now
+        if delay > 0:
+            logger.info(f"Pacing {self.account}: waiting {delay:.1f}s ({self.rate:.0f} profiles/h)")
+            time.sleep(delay)
+        return True
+
+    def wait_for_slot(self, while_waiting: Callable = None):
+        """
+        Block until the next slot is due without taking it (the following wait() returns
+        at once), running while_waiting first so that work overlaps the pause.
+        """
+        if while_waiting:
+            while_waiting()
+        with self._lock, self._shared_visits():
+            if self.visits_today >= self.daily_cap:
+                return
+            delay = max(self._next_slot, self._cooldown_until) - time.monotonic()
+        if delay > 0:
+            logger.info(f"Pacing {self.account}: waiting {delay:.1f}s ({self.rate:.0f} profiles/h)")
+            time.sleep(delay)
+
+    def record(self, outcome: str):
+        """Feed back how the last profile went and adapt the rate"""
+        with self._lock:
+            self.signals[outcome] = self.signals.get(outcome, 0) + 1
+            self._recent.append(outcome)
+            if outcome == OK:
+                self.rate = min(self.target_per_hour, self.rate + self.target_per_hour * 0.05)
+                return
+            if outcome == CHECKPOINT:
+                self.rate = self.rate * 0.25
+                self._cooldown_until = time.monotonic() + CHECKPOINT_COOLDOWN_SECONDS
+                logger.warning(f"Pacing {self.account}: checkpoint redirect, cooling down {CHECKPOINT_COOLDOWN_SECONDS:.0f}s")
+            elif outcome == EMPTY:
+                self.rate = self.rate * 0.8
+            elif outcome == ERROR:
+                self.rate = self.rate * 0.8
+                if sum(1 for o in self._recent if o == ERROR) >= 3:
+                    # Error burst: halve again and pause a few minutes
+                    self.rate = self.rate * 0.5
+                    self._cooldown_until = max(self._cooldown_until, time.monotonic() + random.uniform(120, 300))
+                    self._recent.clear()
+                    logger.warning(f"Pacing {self.account}: error burst, slowing to {self.rate:.0f} profiles/h")
+            self.rate = max(self.min_per_hour, self.rate)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "account": self.account,
+                "rate_per_hour": round(self.rate, 1),
+                "target_per_hour": self.target_per_hour,
+                "visits_today": self.visits_today,
+                "daily_cap": self.daily_cap,
+                **{f"{outcome}_signals": count for outcome, count in self.signals.items()},
+            }
+
+
+_pacers = {}
+_pacers_lock = threading.Lock()
+
+
+def get_pacer(account: str, target_per_hour: float = None, daily_cap: int = None) -> AccountPacer:
+    """Process-wide pacer per account, so threads sharing an account share its budget"""
+    with _pacers_lock:
+        pacer = _pacers.get(account)
+        if pacer is None:
+            pacer = _pacers[account] = AccountPacer(account, target_per_hour or DEFAULT_TARGET_PER_HOUR,
+                                                    daily_cap or DEFAULT_DAILY_CAP)
+        elif target_per_hour:
+            # A new target applies right away downward; upward the account recovers to it gradually
+            pacer.target_per_hour = target_per_hour
+            pacer.rate = min(pacer.rate, target_per_hour)
+            pacer.min_per_hour = min(pacer.min_per_hour, target_per_hour)
+        if daily_cap:
+            pacer.daily_cap = daily_cap
+    return pacer
+
+
+def pacing_stats() -> List[Dict]:
+    with _pacers_lock:
+        pacers = list(_pacers.values())
+    return [pacer.stats() for pacer in pacers]
@@ -0,0 +1,107 @@
+import logging
+import threading
+from typing import Dict, List, Optional
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# URL patterns (Chrome DevTools wildcards) dropped before they are requested
+_MEDIA = ["*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*", "*dms/playlist/*"]
+_FONTS = ["*.woff*", "*.ttf*", "*.otf*", "*.eot*"]
+_ANALYTICS = [
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*bat.bing.com*",
+    "*connect.facebook.net*", "*px.ads.linkedin.com*", "*snap.licdn.com/li.lms-analytics*",
+    "*linkedin.com/li/track*", "*linkedin.com/sensorCollect*",
+]
+_IMAGES = ["*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.svg*", "*.ico*", "*media.licdn.com/dms/image/*"]
+
+BLOCK_PROFILES = {
+    "off": [],
+    # Nothing the scrapers read or click depends on these
+    "light": _MEDIA + _FONTS + _ANALYTICS,
+    # Also images: the biggest saving, but pages look broken if you watch the browser
+    "aggressive": _MEDIA + _FONTS + _ANALYTICS + _IMAGES,
+}
+
+# Navigation + resource timings of the current page; transferSize is 0 for cross-origin
+# resources without Timing-Allow-Origin, so bytes are a lower bound
+PAGE_WEIGHT_JS = """
+const nav = performance.getEntriesByType('navigation')[0];
+const resources = performance.getEntriesByType('resource');
+let bytes = nav ? (nav.transferSize || 0) : 0;
+for (const r of resources) { bytes += r.transferSize || 0; }
+const loadEnd = nav ? (nav.loadEventEnd || nav.domContentLoadedEventEnd) : 0;
+return {bytes: bytes, resources: resources.length, load_ms: nav && loadEnd ? loadEnd - nav.startTime : null};
+"""
+
+
+def apply_block_profile(driver, profile: str) -> bool:
+    """Block the profile's URL patterns in this browser via the DevTools protocol"""
+    patterns = BLOCK_PROFILES.get(profile)
+    if patterns is None:
+        logger.warning(f"Unknown block profile {profile!r}, loading everything")
+        patterns = []
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        return True
+    except Exception as e:
+        logger.warning(f"Could not apply block profile {profile!r}: {e}")
+        return False
+
+
+def enable_page_timings(driver):
+    """Once per browser: let every page's resource timing buffer hold a whole feed (default is 250 entries)"""
+    try:
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument",
+                               {"source": "performance.setResourceTimingBufferSize(5000);"})
+    except Exception as e:
+        logger.debug(f"Could not enlarge the resource timing buffer: {e}")
+
+
+def measure_page(driver) -> Optional[Dict]:
+    """Bytes transferred, resource count and load time of the page currently loaded"""
+    try:
+        return driver.execute_script(PAGE_WEIGHT_JS)
+    except Exception as e:
+        logger.debug(f"Could not read page timings: {e}")
+        return None
+
+
+class PageWeightStats:
+    """Per-page weight samples grouped by stage and block profile, to compare the profiles"""
+
+    def __init__(self):
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, profile: str, sample: Optional[Dict]):
+        if not sample:
+            return
+        with self._lock:
+            self._samples.setdefault((stage, profile), []).append(sample)
+
+    def summary(self) -> List[Dict]:
+        """One row per (stage, block profile), ready for st.dataframe"""
+        with self._lock:
+            groups = {k: list(v) for k, v in self._samples.items()}
+        rows = []
+        for (stage, profile), samples in sorted(groups.items()):
+            load_times = [s["load_ms"] for s in samples if s.get("load_ms")]
+            rows.append({
+                "stage": stage,
+                "block_profile": profile,
+                "pages": len(samples),
+                "avg_kb": round(sum(s.get("bytes") or 0 for s in samples) / len(samples) / 1024, 1),
+                "avg_resources": round(sum(s.get("resources") or 0 for s in samples) / len(samples), 1),
+                "avg_load_ms": round(sum(load_times) / len(load_times)) if load_times else None,
+            })
+        return rows
+
+
+_page_weight_stats = PageWeightStats()
+
+
+def get_page_weight_stats() -> PageWeightStats:
+    return _page_weight_stats
@@ -0,0 +1,113 @@
+"""
+Live profile extractors used by stage_2: the single execute_script pass and the
+original per-field waits.
+
+Selenium only, no Supabase client, so benchmarks can import them without credentials.
+"""
+import json
+import random
+import string
+
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.common.by import By
+
+from stages.lead_ids import canonical_lead_id
+from stages.profile_fields import PROFILE_XPATHS, empty_profile, profile_from_matches
+
+
+# Evaluates every XPath in one round trip; returns {field: [{"text", "href"}, ...]} as JSON
+EXTRACT_PROFILE_JS = """
+const xpaths = arguments[0];
+const result = {};
+for (const [field, xpath] of Object.entries(xpaths)) {
+    const snapshot = document.evaluate(xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    const matches = [];
+    for (let i = 0; i < snapshot.snapshotLength; i++) {
+        const node = snapshot.snapshotItem(i);
+        matches.push({text: (node.innerText || node.textContent || '').trim(), href: node.href || node.getAttribute('href')});
+    }
+    result[field] = matches;
+}
+return JSON.stringify(result);
+"""
+
+
+def extract_profile_single_pass(driver, url, wait):
+    """Wait once for the profile card, then read every field in a single execute_script call"""
+    wait.until(EC.presence_of_element_located((By.XPATH, PROFILE_XPATHS['name'])))
+    matches = json.loads(driver.execute_script(EXTRACT_PROFILE_JS, PROFILE_XPATHS))
+    return profile_from_matches(url, matches)
+
+
+def extract_profile_per_field(driver, url, wait):
+    """Original extraction: one wait.until per field (each missing field costs a full wait timeout)"""
+    details = empty_profile(url)
+
+    # Lead_id 
+    try:
+        details['lead_id'] = canonical_lead_id(url)
+    except:
+        details['lead_id'] = ''.join(random.choices(string.ascii_letters + string.digits, k=12))
+
+    # Name - ORIGINAL LOGIC PRESERVED
+    name_element = wait.until(EC.presence_of_element_located((By.XPATH, PROFILE_XPATHS['name'])))
+    details['name'] = name_element.text.strip()
+
+    # Bio - ORIGINAL LOGIC PRESERVED
+    try:
+        bio_element = wait.until(EC.presence_of_element_located((By.XPATH, PROFILE_XPATHS['bio'])))
+        details['bio'] = bio_element.text.strip()
+    except:
+        details['bio'] = ""
+
+    # Title - ORIGINAL LOGIC PRESERVED
+    try:
+        title_element = wait.until(EC.presence_of_element_located((By.XPATH, PROFILE_XPATHS['title'])))
+        details['title'] = title_element.text.strip()
+    except:
+        details['title'] = ""
+
+    # Location - ORIGINAL LOGIC PRESERVED
+    try:
+        location_element = wait.until(EC.presence_of_element_located((By.XPATH, PROFILE_XPATHS['location'])))
+        details['location'] = location_element.text.strip()
+    except:
+        details['location'] = None
+
+    # Company Name - ORIGINAL LOGIC PRESERVED
+    try:
+        company_name_element = wait.until(EC.presence_of_element_located((By.XPATH, PROFILE_XPATHS['company_name'])))
+        details['company_name'] = company_name_element.text.strip()
+    except:
+        details['company_name'] = None
+
+    # About - ORIGINAL LOGIC PRESERVED
+    try:
+        about_element = wait.until(EC.presence_of_element_located((By.XPATH, PROFILE_XPATHS['about'])))
+        details['bio'] += "\n" + about_element.text.strip()
+    except:
+        pass
+
+    # Skills - ORIGINAL LOGIC PRESERVED
+    try:
+        skills_elements = wait.until(EC.presence_of_all_elements_located((By.XPATH, PROFILE_XPATHS['skills'])))
+        details['skills'] = [skill.text.strip() for skill in skills_elements]
+    except:
+        details['skills'] = []
+
+    # Experience - ORIGINAL LOGIC PRESERVED
+    try:
+        exp_elements = wait.until(EC.presence_of_all_elements_located((By.XPATH, PROFILE_XPATHS['experience'])))
+        details['experience'] = "\n".join([x.text.strip() for x in exp_elements])
+    except:
+        details['experience'] = ""
+
+    # Company LinkedIn page - ORIGINAL LOGIC PRESERVED
+    try:
+        comp_ldk_pages = wait.until(EC.presence_of_all_elements_located((By.XPATH, PROFILE_XPATHS['company_page_url'])))
+        company_links = [comp.get_attribute('href') for comp in comp_ldk_pages if comp.get_attribute('href')]
+        details['company_page_url'] = company_links[0] if company_links else None
+    except:
+        details['company_page_url'] = None
+
+    return details
@@ -0,0 +1,59 @@
+"""
+Profile fields shared by the live scraper (stage_2) and the offline snapshot parser.
+
+Kept free of Selenium and Supabase so parser processes import it cheaply.
+"""
+from typing import List, Dict
+
+from stages.lead_ids import canonical_lead_id
+
+
+# ORIGINAL XPaths - UNCHANGED (shared by the live extractors and the snapshot parser)
+PROFILE_XPATHS = {
+    'name': "//h1[contains(@class, 't-24')]",
+    'bio': '//*[@id="profile-content"]/div/div[2]/div/div/main/section[1]/div[2]/div[2]/div[1]/div[2]',
+    'skills': "//section[descendant::div[@id='skills']]/div[3]/ul/li//a[contains(@href, 'SKILL')]",
+    'experience': "(//section[.//*[@id='experience']]//ul[1]/li)[1]",
+    'about': "//section[descendant::div[@id='about']]/div[3]",
+    'company_page_url': "//section[.//*[@id='experience']]//ul[1]//a[@data-field='experience_company_logo']",
+    'title': "(((//section[.//div[@id='experience']]//li)[1]//a)[2]/div)[1]",
+    'company_name': "(//section[.//*[@id='experience']]//ul[1]//a[@data-field='experience_company_logo'])[2]/span[1]/span[@aria-hidden='true']",
+    'location': "//div[*/a[contains(@href,'contact-info')]]/span[1]",
+}
+
+
+def empty_profile(url):
+    return {
+        'lead_id': None,
+        'name': None,
+        'title': None,
+        'location': None,
+        'profile_url': url,
+        'bio': None,
+        'skills': [],
+        'experience': None,
+        'company_name': None,
+        'company_page_url': None,
+    }
+
+
+def profile_from_matches(url, matches: Dict[str, List[Dict]]) -> Dict:
+    """Build the profile dict from {field: [{"text", "href"}]} with the same defaults as the per-field path"""
+    def first_text(field, default):
+        found = matches.get(field) or []
+        return found[0]['text'] if found else default
+
+    details = empty_profile(url)
+    details['lead_id'] = canonical_lead_id(url)
+    details['name'] = first_text('name', None)
+    details['bio'] = first_text('bio', "")
+    details['title'] = first_text('title', "")
+    details['location'] = first_text('location', None)
+    details['company_name'] = first_text('company_name', None)
+    if matches.get('about'):
+        details['bio'] += "\n" + matches['about'][0]['text']
+    details['skills'] = [m['text'] for m in matches.get('skills') or []]
+    details['experience'] = "\n".join(m['text'] for m in matches.get('experience') or [])
+    company_links = [m['href'] for m in matches.get('company_page_url') or [] if m.get('href')]
+    details['company_page_url'] = company_links[0] if company_links else None
+    return details
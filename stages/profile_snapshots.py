@@ -0,0 +1,110 @@
+import os
+import re
+import gzip
+import time
+import hashlib
+import logging
+import concurrent.futures
+import multiprocessing
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from lxml import html as lxml_html
+
+from stages.lead_ids import canonical_lead_id
+from stages.profile_fields import PROFILE_XPATHS, profile_from_matches
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = ".cache/snapshots"
+_HEADER = re.compile(r"^<!-- snapshot-of: (\S+) captured-at: (\S+) -->\n")
+
+
+def snapshot_path(directory: str, url: str) -> str:
+    name = canonical_lead_id(url) or hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(directory, f"{name}.html.gz")
+
+
+def save_snapshot(directory: str, url: str, page_source: str) -> str:
+    """Write the page gzipped, with the profile URL in a leading comment; returns the file path"""
+    os.makedirs(directory, exist_ok=True)
+    path = snapshot_path(directory, url)
+    tmp_path = path + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        f.write(f"<!-- snapshot-of: {url} captured-at: {int(time.time())} -->\n")
+        f.write(page_source)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_snapshot(path: str) -> Tuple[Optional[str], str]:
+    """Returns (profile URL, page source)"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        content = f.read()
+    header = _HEADER.match(content)
+    if not header:
+        return None, content
+    return header.group(1), content[header.end():]
+
+
+def _node_text(node) -> str:
+    # Close to the browser's innerText: one line per text block, no markup indentation
+    text = node.text_content() if hasattr(node, "text_content") else str(node)
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def matches_from_html(page_source: str, base_url: str, xpaths: Dict[str, str] = None) -> Dict[str, List[Dict]]:
+    """Evaluate every XPath with lxml; same {field: [{"text", "href"}]} shape as EXTRACT_PROFILE_JS"""
+    tree = lxml_html.fromstring(page_source)
+    matches = {}
+    for field, xpath in (xpaths or PROFILE_XPATHS).items():
+        matches[field] = []
+        for node in tree.xpath(xpath):
+            href = node.get("href") if hasattr(node, "get") else None
+            matches[field].append({"text": _node_text(node), "href": urljoin(base_url, href) if href else None})
+    return matches
+
+
+def parse_snapshot(path: str, xpaths: Dict[str, str] = None) -> Optional[Dict]:
+    """Profile dict from a snapshot file, or None when the page has no profile card"""
+    url, page_source = load_snapshot(path)
+    if not page_source.strip():
+        return None
+    details = profile_from_matches(url, matches_from_html(page_source, url or "", xpaths))
+    return details if details['name'] else None
+
+
+def iter_snapshots(directory: str) -> Iterator[str]:
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".html.gz"):
+            yield os.path.join(directory, name)
+
+
+def new_parse_pool(workers: Optional[int] = None) -> concurrent.futures.ProcessPoolExecutor:
+    # spawn, not fork: the scrapers run in threads and forking a threaded process is unsafe
+    return concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _parse_one(args):
+    path, xpaths = args
+    try:
+        return path, parse_snapshot(path, xpaths), None
+    except Exception as e:
+        return path, None, str(e)
+
+
+def parse_archive(directory: str, xpaths: Dict[str, str] = None, workers: Optional[int] = None,
+                  chunksize: int = 16) -> Iterator[Tuple[str, Optional[Dict], Optional[str]]]:
+    """
+    Parse every snapshot in directory in a process pool, without any network access.
+
+    Yields:
+        (path, profile or None, error or None) in file name order
+    """
+    paths = list(iter_snapshots(directory))
+    logger.info(f"Parsing {len(paths)} snapshots from {directory}")
+    with new_parse_pool(workers) as pool:
+        yield from pool.map(_parse_one, ((path, xpaths) for path in paths), chunksize=chunksize)
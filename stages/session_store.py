@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.common.by import By
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SESSION_DIR = ".cache/sessions"
+SESSION_TTL_HOURS = float(os.getenv("SESSION_TTL_HOURS", "24"))
+# LinkedIn's session cookie; when it expires sooner than the TTL, the session does too
+SESSION_COOKIE = "li_at"
+
+
+def is_logged_in(driver) -> bool:
+    """The page the browser landed on belongs to a logged-in session"""
+    current_url = driver.current_url.lower()
+    if any(marker in current_url for marker in ("/login", "/checkpoint", "/authwall", "/uas/")):
+        return False
+    return "/feed" in current_url or "linkedin.com/in/" in current_url
+
+
+def check_login_status(driver):
+    """Check if user is already logged in"""
+    try:
+        if is_logged_in(driver):
+            return True
+        
+        # Try to find elements that indicate logged-in state
+        try:
+            WebDriverWait(driver, 5).until(
+                EC.any_of(
+                    EC.presence_of_element_located((By.XPATH, "//input[@placeholder='Search']")),
+                    EC.presence_of_element_located((By.CSS_SELECTOR, "[data-control-name='nav.settings']"))
+                )
+            )
+            return True
+        except:
+            return False
+            
+    except Exception as e:
+        logger.warning(f"Error checking login status: {e}")
+        return False
+
+
+class SessionStore:
+    """
+    Validated LinkedIn cookies per account, one JSON file each, with an expiry.
+
+    Only sessions that reached the feed are saved, and a session that fails to
+    log in when restored (or runs into a checkpoint) is dropped, so the next
+    login for that account falls back to typing the credentials.
+    """
+
+    def __init__(self, directory: str = SESSION_DIR, ttl_hours: float = SESSION_TTL_HOURS):
+        self.directory = directory
+        self.ttl_hours = ttl_hours
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, account: str) -> str:
+        digest = hashlib.sha1(str(account).encode("utf-8")).hexdigest()[:12]
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def load(self, account: str) -> Optional[List[Dict]]:
+        """Cookies of the account's session, None when there is none or it expired"""
+        with self._lock:
+            try:
+                with open(self._path(account), "r") as f:
+                    session = json.load(f)
+            except (OSError, ValueError):
+                return None
+        if session.get("account") != account or time.time() > session.get("expires_at", 0):
+            logger.info(f"Stored session for {account} has expired")
+            self.invalidate(account)
+            return None
+        return session["cookies"]
+
+    def save(self, account: str, cookies: List[Dict]):
+        expires_at = time.time() + self.ttl_hours * 3600
+        for cookie in cookies:
+            if cookie.get("name") == SESSION_COOKIE and cookie.get("expiry"):
+                expires_at = min(expires_at, cookie["expiry"])
+        path = self._path(account)
+        with self._lock:
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"account": account, "cookies": cookies, "saved_at": time.time(), "expires_at": expires_at}, f)
+            os.replace(tmp_path, path)
+        logger.info(f"Session saved for {account}, valid for {(expires_at - time.time()) / 3600:.1f}h")
+
+    def invalidate(self, account: str):
+        with self._lock:
+            try:
+                os.remove(self._path(account))
+                logger.info(f"Stored session for {account} dropped")
+            except OSError:
+                pass
+
+    def remember(self, driver, account: str) -> bool:
+        """Save the driver's cookies for account; call only once the login is confirmed"""
+        try:
+            self.save(account, driver.get_cookies())
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save session for {account}: {e}")
+            return False
+
+    def restore(self, driver, account: str, validate: Callable = None) -> bool:
+        """
+        Log the driver in with the account's stored cookies.
+
+        Returns:
+            bool: True when the feed loads logged in; False (and the session is dropped
+                  if it was stale) when the caller has to type the credentials
+        """
+        cookies = self.load(account)
+        if not cookies:
+            return False
+        try:
+            # Cookies can only be set on the domain that is open
+            driver.get("https://www.linkedin.com")
+            time.sleep(random.uniform(1, 2))
+            for cookie in cookies:
+                try:
+                    driver.add_cookie(cookie)
+                except Exception as e:
+                    logger.debug(f"Failed to add cookie {cookie.get('name', 'unknown')}: {e}")
+            driver.get("https://www.linkedin.com/feed/")
+            time.sleep(random.uniform(2, 4))
+            if (validate or is_logged_in)(driver):
+                logger.info(f"Logged in as {account} with the stored session")
+                return True
+        except Exception as e:
+            logger.warning(f"Could not restore session for {account}: {e}")
+            return False
+        logger.info(f"Stored session for {account} no longer logs in")
+        self.invalidate(account)
+        return False
+
+
+_session_store = None
+_session_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """Process-wide store shared by stage 1 and stage 2"""
+    global _session_store
+    with _session_store_lock:
+        if _session_store is None:
+            _session_store = SessionStore()
+    return _session_store
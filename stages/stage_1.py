@@ -2,18 +2,23 @@ import os
 import time
 import random
 import logging
-import json
+import re
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
-from selenium import webdriver
 import pandas as pd
 from selenium.webdriver.common.keys import Keys
-from datetime import datetime, timedelta
+from datetime import datetime
 from supabase import create_client, Client
 from dotenv import load_dotenv
 import time
 import traceback
+from stages.db_writes import ingest_leads
+from stages.lead_ids import canonical_lead_id
+from stages.browser_pool import get_browser_pool
+from stages.page_weight import get_page_weight_stats, measure_page
+from stages.session_store import check_login_status, get_session_store, is_logged_in
+from stages.dedupe_index import LEAD, POST, get_dedupe_index
 
 
 # Set up logging
@@ -34,70 +39,6 @@ def slow_type(element, text, delay_range=(0.05, 0.15)):
         time.sleep(random.uniform(*delay_range))
 
 
-def save_cookies_to_cache(driver, expiry_hours=24):
-    """Save browser cookies to JSON file with expiry date"""
-    try:
-        cookies = driver.get_cookies()
-        cache_data = {
-            "cookies": cookies,
-            "expiry": (datetime.now() + timedelta(hours=expiry_hours)).isoformat(),
-            "created": datetime.now().isoformat()
-        }
-        
-        with open('cookie.json', 'w') as f:
-            json.dump(cache_data, f, indent=2)
-        
-        logger.info(f"Cookies saved to cache with {expiry_hours}h expiry")
-        return True
-    except Exception as e:
-        logger.error(f"Failed to save cookies: {e}")
-        return False
-
-
-def load_cookies_from_cache():
-    """Load cookies from JSON file if not expired"""
-    try:
-        if not os.path.exists('cookie.json'):
-            logger.info("No cookie cache file found")
-            return None
-            
-        with open('cookie.json', 'r') as f:
-            cache_data = json.load(f)
-        
-        expiry = datetime.fromisoformat(cache_data["expiry"])
-        
-        if datetime.now() > expiry:
-            logger.info("Cookie cache has expired")
-            return None
-        
-        logger.info("Valid cookie cache found")
-        return cache_data["cookies"]
-        
-    except Exception as e:
-        logger.error(f"Failed to load cookies: {e}")
-        return None
-
-
-def apply_cookies_to_driver(driver, cookies):
-    """Apply saved cookies to the current driver session"""
-    try:
-        # Navigate to LinkedIn first to set the domain
-        driver.get("https://www.linkedin.com")
-        time.sleep(random.uniform(2, 4))
-        
-        for cookie in cookies:
-            try:
-                driver.add_cookie(cookie)
-            except Exception as e:
-                logger.warning(f"Failed to add cookie {cookie.get('name', 'unknown')}: {e}")
-        
-        logger.info("Cookies applied to driver")
-        return True
-    except Exception as e:
-        logger.error(f"Failed to apply cookies: {e}")
-        return False
-
-
 def perform_login(driver, wait, username, password):
     """Perform login with slow typing and save cookies"""
     try:
@@ -137,14 +78,14 @@ def perform_login(driver, wait, username, password):
         # Wait for login to complete
         timeout = 40
         elapsed = 0
-        while 'feed' not in driver.current_url and elapsed < timeout:
+        while not is_logged_in(driver) and elapsed < timeout:
             time.sleep(1)
             elapsed += 1
         
-        if 'feed' in driver.current_url:
+        if is_logged_in(driver):
             logger.info("Login successful")
-            # Save cookies after successful login
-            save_cookies_to_cache(driver, expiry_hours=24)
+            # Keep the session so the next login for this account skips the form
+            get_session_store().remember(driver, username)
             return True
         else:
             logger.error("Login failed - didn't reach feed page")
@@ -155,40 +96,182 @@ def perform_login(driver, wait, username, password):
         return False
 
 
-def check_login_status(driver):
-    """Check if user is already logged in"""
+# Tags like buttons not seen before with the URN of their post (or a running number when the
+# post has none) and returns only those, so each scroll costs one call however long the feed gets.
+# The button's label carries the post's reaction count.
+DISCOVER_POSTS_JS = """
+const found = [];
+document.querySelectorAll('button[data-reaction-details]:not([data-scout-key])').forEach(btn => {
+    const post = btn.closest('[data-urn], [data-id], [data-chameleon-result-urn]');
+    const urn = post ? (post.getAttribute('data-urn') || post.getAttribute('data-id')
+                        || post.getAttribute('data-chameleon-result-urn')) : null;
+    window.__scoutSeq = (window.__scoutSeq || 0) + 1;
+    const key = urn || ('post-' + window.__scoutSeq);
+    btn.setAttribute('data-scout-key', key);
+    found.push({key: key, urn: urn, reactions: (btn.getAttribute('aria-label') || btn.innerText || '').trim()});
+});
+return found;
+"""
+
+
+def parse_reaction_count(text):
+    """Reactions from a like button label: "1,234", "1.2K", "Jane Doe and 45 others" -> 46; None if absent"""
+    numbers = re.findall(r"(\d[\d,]*(?:\.\d+)?)\s*([KkMm]?)\b", text or "")
+    if not numbers:
+        return None
+    number, suffix = numbers[-1]
+    count = float(number.replace(",", "")) * {"k": 1000, "m": 1000000}.get(suffix.lower(), 1)
+    if re.search(r"\band\b.*\bother", text):
+        count += 1
+    return int(count)
+
+
+def discover_posts(driver, target_posts=None, max_stale_scrolls=3, max_scroll_seconds=None):
+    """
+    Scroll the results and yield each post ({"key", "urn", "reactions"}) as soon as it appears.
+
+    Stops once target_posts posts were found, after max_stale_scrolls scrolls in a row
+    brought nothing new (the feed is exhausted), or after max_scroll_seconds spent
+    scrolling. The caller processes each post before the next scroll.
+    """
+    seen = set()
+    stale_scrolls = 0
+    scroll_seconds = 0.0
+    while True:
+        new_posts = [post for post in driver.execute_script(DISCOVER_POSTS_JS) or [] if post["key"] not in seen]
+        for post in new_posts:
+            seen.add(post["key"])
+            yield post
+            if target_posts and len(seen) >= target_posts:
+                logger.info(f"Target of {target_posts} posts reached")
+                return
+        stale_scrolls = 0 if new_posts else stale_scrolls + 1
+        logger.info(f"Posts found so far: {len(seen)}")
+        if stale_scrolls >= max_stale_scrolls:
+            logger.info(f"No new posts after {stale_scrolls} scrolls, the results are exhausted")
+            return
+        if max_scroll_seconds and scroll_seconds >= max_scroll_seconds:
+            logger.info(f"Scrolled for {scroll_seconds:.0f}s, stopping")
+            return
+        started = time.monotonic()
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        time.sleep(random.uniform(3, 5))
+        scroll_seconds += time.monotonic() - started
+
+
+# Reads the reactor rows of the open likes popup that were not read yet and marks them.
+# Rows read on earlier expansions are emptied (all but the last few, which the popup
+# scrolls from) so the DOM stays small on posts with thousands of reactions.
+# With countOnly it only returns how many unread rows there are.
+REACTORS_JS = """
+const [keepRows, countOnly] = arguments;
+const popup = document.querySelector('[role="dialog"]') || document;
+const unread = popup.querySelectorAll('a[rel="noopener noreferrer"][href*="/in"]:not([data-scout-read])');
+if (countOnly) return unread.length;
+const fresh = [];
+unread.forEach(a => {
+    a.setAttribute('data-scout-read', '1');
+    fresh.push({href: a.href, text: a.innerText.trim()});
+});
+const read = popup.querySelectorAll('a[data-scout-read]');
+for (let i = 0; i < read.length - keepRows; i++) {
+    // Empty the row rather than remove it, the list's own bookkeeping still points at it
+    (read[i].closest('li') || read[i]).replaceChildren();
+}
+return fresh;
+"""
+POPUP_ROWS_KEPT = 10
+
+
+THREE_DOT_XPATH = "//button[contains(@aria-label, 'Open control menu for post by')]"
+COPY_POST_URL_XPATH = "//h5[contains(., 'Copy link to post')]"
+_POST_URN = re.compile(r"^urn:li:(activity|ugcPost|share):\d+$")
+
+
+def post_url_from_urn(urn):
+    """Permalink of a post from its URN, None when the URN is missing or not a post"""
+    if urn and _POST_URN.match(urn):
+        return f"https://www.linkedin.com/feed/update/{urn}/"
+    return None
+
+
+def post_menu_button(driver, like_btn, idx):
+    """Three-dot menu of the post a like button belongs to"""
     try:
-        current_url = driver.current_url
-        if 'feed' in current_url or 'linkedin.com/in/' in current_url:
-            return True
-        
-        # Try to find elements that indicate logged-in state
-        try:
-            WebDriverWait(driver, 5).until(
-                EC.any_of(
-                    EC.presence_of_element_located((By.XPATH, "//input[@placeholder='Search']")),
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "[data-control-name='nav.settings']"))
-                )
-            )
-            return True
-        except:
-            return False
-            
+        return like_btn.find_element(
+            By.XPATH, "./ancestor::*[@data-urn or @data-id or @data-chameleon-result-urn][1]" + THREE_DOT_XPATH)
+    except Exception:
+        # Post container without a URN: fall back to matching by position
+        menus = driver.find_elements(By.XPATH, THREE_DOT_XPATH)
+        return menus[idx - 1] if len(menus) >= idx else None
+
+
+def copy_post_url(driver, like_btn, idx):
+    """Post URL through the three-dot menu's "Copy link to post" toast (slow, fallback only)"""
+    wait = WebDriverWait(driver, 10)
+    try:
+        # Click the three-dot menu
+        logger.info("Attempting to click three-dot menu to extract post URL...")
+        menu_btn = post_menu_button(driver, like_btn, idx)
+        if menu_btn:
+            driver.execute_script("arguments[0].scrollIntoView(true);", menu_btn)
+            time.sleep(random.uniform(2, 4))
+            driver.execute_script("arguments[0].click();", menu_btn)
+        time.sleep(random.uniform(3, 5))  # Increased delay
     except Exception as e:
-        logger.warning(f"Error checking login status: {e}")
-        return False
+        logger.warning(f"Could not click three-dot menu: {e}")
+
+    try:
+        logger.info("Attempting to locate 'Copy link to post' button...")
+        copy_post_url_btn = wait.until(EC.presence_of_element_located((By.XPATH, COPY_POST_URL_XPATH)))
+        time.sleep(random.uniform(2, 4))
+        # Click "Copy link to post"
+        logger.info("Clicking 'Copy link to post' button...")
+        driver.execute_script("arguments[0].click();", copy_post_url_btn)
+        time.sleep(random.uniform(2, 4))
+    except Exception as e:
+        logger.warning(f"Could not click 'Copy link to post' button: {e}")
+
+    try:
+        # Grab "View post" link from the popup
+        logger.info("Locating 'View post' link...")
+        view_post = wait.until(EC.presence_of_element_located((By.XPATH, "//a[text()='View post']")))
+        post_url = view_post.get_attribute("href")
+        time.sleep(random.uniform(2, 4))
+        return post_url
+    except Exception as e:
+        logger.warning(f"Could not extract post URL: {e}")
+        return None
 
 
-def scout_leads(time_to_load, username, password, search_url : str = "", keywords: str = "") -> list:
-    driver = webdriver.Chrome()
+def scout_leads(time_to_load, username, password, search_url : str = "", keywords: str = "", stats_callback=None,
+                leads_callback=None, target_posts=None, max_stale_scrolls=3, skip_known=True) -> list:
+    """
+    Harvest reactors of LinkedIn posts into all_leads.
+
+    Posts are processed as they are discovered while scrolling (see discover_posts).
+
+    Args:
+        time_to_load: Upper bound on the seconds spent scrolling the results
+        target_posts: Stop after this many posts (None: until the results run out)
+        max_stale_scrolls: Scrolls in a row without new posts before giving up
+        stats_callback: Called with the all_leads write stats
+                        (collected, unique, inserted, already_known, failed, requests)
+        leads_callback: Called with the all_leads rows each popup expansion newly inserted, as
+                        soon as they are written, before the run finishes (used by the headless
+                        pipeline; scout_leads does the writing, the callback only consumes)
+        skip_known: Skip leads collected by earlier runs, and posts harvested before unless their
+                    reaction count grew; those are expanded only up to the reactors already known
+    """
+    # A warm, already logged-in browser for this account when the pool has one
+    browser_pool = get_browser_pool()
+    browser = browser_pool.acquire(username)
+    driver = browser.driver
     wait = WebDriverWait(driver, 10)
+    keep_browser = True
 
     like_btn_xpath = "//button[@data-reaction-details]"
     admin_xpath = "//div[@class='fie-impression-container']/div[@class='relative']/div[1]/div/div/a[1]"  # The one who posted the post
-    leads_xpath = "//a[@rel='noopener noreferrer' and contains(@href, '/in')]"
-    three_dot_xpath = "//button[contains(@aria-label, 'Open control menu for post by')]"
-    copy_post_url_xpath = "//h5[contains(., 'Copy link to post')]"
-    post_url_xpath = "//a[contains(@href, '/posts')]"
     # leads_name_xpath = "//a[@rel='noopener noreferrer' and contains(@href, '/in')]//div[@class='artdeco-entity-lockup__title ember-view']/span[@aria-hidden='true']"
     # leads_bio_xpath = "//a[@rel='noopener noreferrer' and contains(@href, '/in')]//div[@class='artdeco-entity-lockup__caption ember-view']"
     cross_btn = "(//button[@aria-label='Dismiss'])[1]"
@@ -199,29 +282,74 @@ def scout_leads(time_to_load, username, password, search_url : str = "", keyword
 
     leads_list = [] #It only contains list of urls
     leads_data_list = [] #It contains list of dict
+    unique_leads = {}  # lead_id -> all_leads row; the same reactor shows up under many posts
+    pending_leads = []  # rows of unique_leads not written to all_leads yet
+    ingest_stats = {"inserted": 0, "inserted_ids": [], "already_known": 0, "failed": 0, "requests": 0, "errors": []}
+    failed_ids = set()
+
+    dedupe_index = get_dedupe_index() if skip_known else None
+    harvest_stats = {"skipped_known_posts": 0, "revisited_posts": 0, "skipped_known_leads": 0, "post_urls_from_menu": 0}
+
+    def flush_leads():
+        """Write pending reactors to all_leads; leads_callback gets the ones new there"""
+        if not pending_leads:
+            return
+        rows = list(pending_leads)
+        pending_leads.clear()
+        # Chunked upsert that ignores lead_ids already in all_leads
+        report = ingest_leads(supabase, rows)
+        for name in ("inserted", "already_known", "failed", "requests"):
+            ingest_stats[name] += report[name]
+        ingest_stats["inserted_ids"].extend(report["inserted_ids"])
+        ingest_stats["errors"].extend(report["errors"])
+        batch_failed = {lead_id for err in report["errors"] for lead_id in err["ids"]}
+        failed_ids.update(batch_failed)
+        if dedupe_index:
+            # Inserted or already in all_leads: either way the next run can skip them
+            dedupe_index.add(LEAD, [row["lead_id"] for row in rows if row["lead_id"] not in batch_failed])
+        if leads_callback and report["inserted_ids"]:
+            inserted = set(report["inserted_ids"])
+            leads_callback([row for row in rows if row["lead_id"] in inserted])
+
+    def emit_reactors(post_url, seen_urls, post_lead_ids, known_reactors):
+        """
+        Queue the popup's unread reactors for all_leads. With a leads_callback they are
+        written (and handed over) right away, one batch per expansion; otherwise once per post.
+
+        Returns:
+            int: rows read that were not yet known as reactors of this post
+        """
+        new_to_post = 0
+        for row in driver.execute_script(REACTORS_JS, POPUP_ROWS_KEPT, False) or []:
+            if row["href"] and row["href"] not in seen_urls:
+                seen_urls.add(row["href"])
+                lead_id = canonical_lead_id(row["href"])
+                post_lead_ids.add(lead_id)
+                new_to_post += lead_id not in known_reactors
+                if dedupe_index and dedupe_index.contains(LEAD, lead_id):
+                    harvest_stats["skipped_known_leads"] += 1
+                    continue
+                leads_list.append({'linkedin_url': row["href"], 'bio': row["text"], 'post_url': post_url})
+                if lead_id and lead_id not in unique_leads:
+                    unique_leads[lead_id] = {"lead_id": lead_id, "linkedin_url": row["href"], "scraped": False, "bio": row["text"], "post_url": post_url}
+                    pending_leads.append(unique_leads[lead_id])
+        if leads_callback:
+            flush_leads()
+        return new_to_post
 
     try:
         # Initial navigation with delay
         driver.get("https://www.linkedin.com/feed/")
         time.sleep(random.uniform(3, 6))
 
-        # Try to load cached cookies first
-        cached_cookies = load_cookies_from_cache()
         login_required = True
-        
-        if cached_cookies:
-            logger.info("Attempting to use cached cookies...")
-            if apply_cookies_to_driver(driver, cached_cookies):
-                # Navigate to feed to test cookies
-                driver.get("https://www.linkedin.com/feed/")
-                time.sleep(random.uniform(3, 5))
-                
-                # Check if login worked
-                if check_login_status(driver):
-                    logger.info("Successfully logged in using cached cookies")
-                    login_required = False
-                else:
-                    logger.info("Cached cookies didn't work, proceeding with manual login")
+        if browser.logged_in and check_login_status(driver):
+            logger.info("Reusing logged-in browser from the pool")
+            login_required = False
+
+        # Then this account's stored session, before typing the credentials
+        if login_required and get_session_store().restore(driver, username):
+            login_required = False
 
         # Perform login if needed
         if login_required:
@@ -231,7 +359,9 @@ def scout_leads(time_to_load, username, password, search_url : str = "", keyword
 
             if not perform_login(driver, wait, username, password):
                 logger.error("Login failed, exiting...")
+                keep_browser = False
                 return []
+        browser_pool.ready(browser)
 
         # Add delay after login
         time.sleep(random.uniform(3, 6))
@@ -259,40 +389,37 @@ def scout_leads(time_to_load, username, password, search_url : str = "", keyword
         else:
             driver.get(search_url)
 
-        # --- SCROLL until enough posts are loaded ---
+        # --- SCROLL and process posts as they are discovered ---
         try:
-            start_time = time.time()
-            end_time = time.time()
-            while (end_time-start_time) < time_to_load:  # scroll till the given time
-                like_elements = wait.until(
-                    EC.presence_of_all_elements_located((By.XPATH, like_btn_xpath))
-                )
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                i = len(like_elements)
-                end_time = time.time()
-                logger.info(f"Posts loaded so far: {i}")
-                time.sleep(random.uniform(4, 7))  # Increased delay
-
-
+            wait.until(EC.presence_of_all_elements_located((By.XPATH, like_btn_xpath)))
         except Exception as e:
             logger.warning(f"No like buttons found or error occurred: {e}")
 
-
         try:
-            like_elements = wait.until(
-                EC.presence_of_all_elements_located((By.XPATH, like_btn_xpath))
-            )
-
-            three_dot_elements = wait.until(
-                EC.presence_of_all_elements_located((By.XPATH, three_dot_xpath))
-            )
-
-            print(f'Total posts found: {len(like_elements)}')
-            print(f'Total three-dot menus found: {len(three_dot_elements)}')
-
-        # --- LOOP through all like buttons ---
-            for idx, like_btn in enumerate(like_elements, start=1):
+            posts = discover_posts(driver, target_posts=target_posts, max_stale_scrolls=max_stale_scrolls,
+                                   max_scroll_seconds=time_to_load)
+            for idx, post in enumerate(posts, start=1):
+                reactions = parse_reaction_count(post["reactions"])
+                known_reactors = set()
+                if dedupe_index and post["urn"] and dedupe_index.contains(POST, post["urn"]):
+                    # Harvested before: only worth opening again when its reactions grew
+                    last_reactions = dedupe_index.reaction_count(post["urn"])
+                    if reactions is None or last_reactions is None or reactions <= last_reactions:
+                        logger.info(f"Skipping post {idx}, no new reactions since an earlier run: {post['urn']}")
+                        harvest_stats["skipped_known_posts"] += 1
+                        continue
+                    logger.info(f"Revisiting post {idx}: {last_reactions} -> {reactions} reactions")
+                    harvest_stats["revisited_posts"] += 1
+                    known_reactors = dedupe_index.post_reactors(post["urn"])
                 try:
+                    like_btn = driver.find_element(By.CSS_SELECTOR, f'button[data-scout-key="{post["key"]}"]')
+
+                    # Post URL straight from the URN; the three-dot menu only when the markup has none
+                    post_url = post_url_from_urn(post["urn"])
+                    if not post_url:
+                        post_url = copy_post_url(driver, like_btn, idx)
+                        harvest_stats["post_urls_from_menu"] += 1
+                    logger.info(f"Post URL: {post_url}")
 
                     # Scroll to and click like button to open likes popup
                     driver.execute_script("arguments[0].scrollIntoView(true);", like_btn)
@@ -301,108 +428,39 @@ def scout_leads(time_to_load, username, password, search_url : str = "", keyword
                     driver.execute_script("arguments[0].click();", like_btn)
                     logger.info(f"Opened likes popup for post {idx}")
 
-
-# -------------------------   EXTRACT POST URL    ---------------------------------------------------------------------------------------------------------
-
-                    try:
-                        # Click the three-dot menu
-                        logger.info("Attempting to click three-dot menu to extract post URL...")
-                        if three_dot_elements:
-                            logger.info(f"Found {len(three_dot_elements)} three-dot menu elements.")
-                            driver.execute_script("arguments[0].scrollIntoView(true);", three_dot_elements[idx-1])
-                            time.sleep(random.uniform(2, 4))
-                            driver.execute_script("arguments[0].click();", three_dot_elements[idx-1])
-                        time.sleep(random.uniform(3, 5))  # Increased delay
-                    except Exception as e:
-                        logger.warning(f"Could not click three-dot menu: {e}")
-
-                    try:
-                        logger.info("Attempting to locate 'Copy link to post' button...")
-                        copy_post_url_btn = wait.until(EC.presence_of_element_located((By.XPATH, copy_post_url_xpath)))
-                        time.sleep(random.uniform(2, 4))   
-                        # Click "Copy link to post"
-                        logger.info("Clicking 'Copy link to post' button...")
-                        driver.execute_script("arguments[0].click();", copy_post_url_btn)
-                        time.sleep(random.uniform(2, 4))
-                    except Exception as e:
-                        logger.warning(f"Could not click 'Copy link to post' button: {e}")
-                    
+                    # Stream reactors out of the popup: the first page, then each "Show more results" batch
+                    seen_urls = set()
+                    post_lead_ids = set()
                     try:
-                        # Grab "View post" link from the popup
-                        logger.info("Locating 'View post' link...")
-                        view_post = wait.until(EC.presence_of_element_located((By.XPATH, "//a[text()='View post']")))
-                        post_url = view_post.get_attribute("href")
-                        logger.info(f"Post URL: {post_url}")
-                        time.sleep(random.uniform(2, 4))
-                    except Exception as e:
-                        logger.warning(f"Could not extract post URL: {e}")
-                        post_url = None
+                        wait.until(lambda d: d.execute_script(REACTORS_JS, POPUP_ROWS_KEPT, True) > 0)
+                    except Exception:
+                        logger.info("No reactors listed in the popup")
+                    new_to_post = emit_reactors(post_url, seen_urls, post_lead_ids, known_reactors)
 
-# -------------------------   EXTRACT POST URL ----------------------------------------------------------------------------------------------------------------
-
-
-
-                    # Keep clicking "Show more results"
                     click_count = 0
-                    while True:
+                    # On a revisit, stop expanding once a page holds only reactors harvested before
+                    while not (known_reactors and new_to_post == 0):
                         try:
                             show_more_btn = WebDriverWait(driver, 5).until(
                                 EC.element_to_be_clickable((By.XPATH, show_more_likes_xpath))
                             )
-                            logger.info("'Show more results' button found, clicking...")
                             driver.execute_script("arguments[0].click();", show_more_btn)
                             click_count += 1
                             logger.info(f"'Show more results' button clicked {click_count} time(s).")
-                            time.sleep(random.uniform(6, 9))  # Increased delay
                         except Exception:
                             logger.info("No more 'Show more results' button found. Breaking loop.")
                             break
 
-
-                        # Extract post URL
-                            # Locate and click the three-dot menu
+                        # Wait for the new rows instead of a fixed pause, then read only those
                         try:
-                            menu_btn = WebDriverWait(driver, 5).until(
-                                EC.element_to_be_clickable((By.XPATH, three_dot_xpath))
-                            )
-                            driver.execute_script("arguments[0].click();", menu_btn)
-                            time.sleep(random.uniform(2, 4))
-
-                            # Click "Copy link to post"
-                            copy_btn = WebDriverWait(driver, 5).until(
-                                EC.element_to_be_clickable((By.XPATH, "//h5[contains(., 'Copy link to post')]"))
-                            )
-                            driver.execute_script("arguments[0].click();", copy_btn)
-                            time.sleep(random.uniform(2, 4))
-
-                            # Grab "View post" link from the popup
-                            view_post = WebDriverWait(driver, 5).until(
-                                EC.presence_of_element_located((By.XPATH, "//a[text()='View post']"))
-                            )
-                            post_url = view_post.get_attribute("href")
-                            logger.info(f"Post URL: {post_url}")
-
-                        except Exception as e:
-                            logger.warning(f"Could not extract post URL: {e}")
-                            post_url = None
-
-                    # Extract leads
-                    leads = wait.until(EC.presence_of_all_elements_located((By.XPATH, leads_xpath)))
-                    seen_urls = set()
-
-
-                    for lead in leads:
-                        try:
-                            lead_url = lead.get_attribute("href")
-                            lead_info = lead.text.strip()
-
-                            if lead_url and lead_url not in seen_urls:
-                                leads_list.append({'linkedin_url': lead_url, 'bio': lead_info, 'post_url': post_url})
-                                seen_urls.add(lead_url)
-                                logger.info(f"Found lead: {lead_url}")
+                            WebDriverWait(driver, 10).until(lambda d: d.execute_script(REACTORS_JS, POPUP_ROWS_KEPT, True) > 0)
+                        except Exception:
+                            logger.info("'Show more results' added no reactors")
+                        time.sleep(random.uniform(1, 3))
+                        new_to_post = emit_reactors(post_url, seen_urls, post_lead_ids, known_reactors)
 
-                        except Exception as e:
-                            logger.warning(f"Error extracting data for lead {lead.get_attribute('href') if lead else 'unknown'}: {e}")
+                    emit_reactors(post_url, seen_urls, post_lead_ids, known_reactors)
+                    logger.info(f"Post {idx}: {len(seen_urls)} reactors read, {len(post_lead_ids - known_reactors)} new to this post")
 
                     # Close popup
                     try:
@@ -412,6 +470,15 @@ def scout_leads(time_to_load, username, password, search_url : str = "", keyword
                     except:
                         logger.info("No dismiss button found, continuing...")
 
+                    # Only once its reactors are in all_leads: a post recorded earlier would be
+                    # skipped next run even if the write failed or the run died before it
+                    flush_leads()
+                    if dedupe_index and post["urn"] and seen_urls:
+                        if post_lead_ids & failed_ids:
+                            logger.warning(f"Some reactors of post {idx} were not written, it will be harvested again next run")
+                        else:
+                            dedupe_index.record_post(post["urn"], reactions, post_lead_ids)
+
                     # Add delay between posts
                     time.sleep(random.uniform(3, 6))
 
@@ -421,22 +488,25 @@ def scout_leads(time_to_load, username, password, search_url : str = "", keyword
         except Exception as e:
             logger.warning(f"Could not process posts: {e}")
 
+        # Everything the results page pulled in while scrolling, to compare block profiles
+        get_page_weight_stats().record("search", browser.block_profile, measure_page(driver))
+
         # --- Final list ---
         logger.info(f"Total unique leads collected: {len(leads_list)}")
 
-        for lead in leads_list:
-            if '/in/' in lead['linkedin_url']:
-                lead_arr = lead['linkedin_url'].split('/')
-                idx = lead_arr.index('in')
-                lead_id = lead_arr[idx+1]
-                if '?' in lead_id:
-                    lead_id = lead_id.split('?')[0]
-                lead_data = {"lead_id": lead_id, "linkedin_url": lead['linkedin_url'], "scraped": False, "bio": lead['bio'], "post_url": lead['post_url']}
-                leads_data_list.append(lead_data)
-                try:
-                    supabase.table("all_leads").insert(lead_data).execute()
-                except Exception as e:
-                    logger.warning(f"Error inserting lead into Supabase: {e}")
+        # Whatever a failed post left unwritten
+        flush_leads()
+        leads_data_list = list(unique_leads.values())
+        ingest_stats.update({"collected": len(leads_list), "unique": len(leads_data_list), **harvest_stats})
+        logger.info(
+            f"all_leads: {ingest_stats['inserted']} inserted, {ingest_stats['already_known']} already known, "
+            f"{ingest_stats['failed']} failed in {ingest_stats['requests']} request(s); skipped "
+            f"{harvest_stats['skipped_known_posts']} unchanged posts and {harvest_stats['skipped_known_leads']} known leads, "
+            f"revisited {harvest_stats['revisited_posts']} posts with new reactions; "
+            f"{harvest_stats['post_urls_from_menu']} post URLs needed the three-dot menu"
+        )
+        if stats_callback:
+            stats_callback(ingest_stats)
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f'leads_list_{timestamp}.csv'
@@ -450,10 +520,11 @@ def scout_leads(time_to_load, username, password, search_url : str = "", keyword
     except Exception as e:
         logger.error(f"An error occurred during login or scraping: {e}")
         logger.error(traceback.format_exc())
+        keep_browser = False
         return []
     finally:
-        time.sleep(random.uniform(5, 8))
-        driver.quit()
+        # Logged-in, healthy browsers stay warm for the next run with this account
+        browser_pool.release(browser, keep=keep_browser)
 
 
 # if __name__ == "__main__":
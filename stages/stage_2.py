@@ -1,20 +1,27 @@
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import TimeoutException
 import time
 import random
 import logging
-from typing import List, Dict
-import pandas as pd
-from fake_useragent import UserAgent
+from typing import List, Dict, Iterable
 from supabase import create_client, Client
 from dotenv import load_dotenv
 import os
-import random, string
 import json
+import hashlib
 import threading
+import concurrent.futures
+import concurrent.futures.process
+from stages.db_writes import BatchWriter, WriteAheadLog, save_scraped_profiles
+from stages import pacing
+from stages.browser_pool import create_driver, get_browser_pool
+from stages.page_weight import get_page_weight_stats, measure_page
+from stages.session_store import check_login_status, get_session_store, is_logged_in
+from stages.profile_fields import PROFILE_XPATHS
+from stages.profile_extraction import extract_profile_per_field, extract_profile_single_pass
+from stages.profile_snapshots import SNAPSHOT_DIR, save_snapshot, parse_snapshot, new_parse_pool
 # Removed signal and atexit imports for Streamlit compatibility
 
 # Set up supabase 
@@ -27,6 +34,133 @@ supabase: Client = create_client(url, key)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class ProfileSink:
+    """
+    Buffered, crash-safe writer for scraped profiles.
+
+    Each profile is first appended to a local write-ahead log, then written to
+    lead_details / all_leads in batches by a background thread, so slow or failing
+    Supabase calls never stall the browser. Profiles whose write failed (or never
+    happened because the process died) stay in the log and are replayed on the
+    next start.
+    """
+
+    def __init__(self, client, wal_path: str = ".cache/stage2_profiles.wal.jsonl",
+                 batch_size: int = 20, flush_interval: float = 10.0, max_queue: int = 1000):
+        self.client = client
+        self.wal = WriteAheadLog(wal_path)
+        self.writer = BatchWriter(self._write, batch_size=batch_size, flush_interval=flush_interval,
+                                  max_queue=max_queue, name="profile-writer")
+        replay = self.wal.pending()
+        if replay:
+            logger.info(f"Replaying {len(replay)} scraped profiles from the write-ahead log")
+        for profile in replay:
+            self.writer.put(profile)
+
+    def add(self, profile: Dict):
+        self.wal.append(profile['lead_id'], profile)
+        self.writer.put(profile)
+
+    def flush(self):
+        """Block until every profile added so far has been attempted"""
+        self.writer.flush()
+
+    def _write(self, profiles: List[Dict]) -> List[Dict]:
+        reports = save_scraped_profiles(self.client, profiles)
+        failed_ids = {lead_id for report in reports for err in report["errors"] for lead_id in err["ids"]}
+        written = [p['lead_id'] for p in profiles if p['lead_id'] not in failed_ids]
+        self.wal.ack(written)
+        logger.info(f"Saved {len(written)} profiles to lead_details ({len(failed_ids)} kept in the write-ahead log)")
+        return reports
+
+
+_profile_sink = None
+_profile_sink_lock = threading.Lock()
+
+
+def get_profile_sink() -> ProfileSink:
+    """Process-wide sink shared by all scraper threads (one write-ahead log per process)"""
+    global _profile_sink
+    with _profile_sink_lock:
+        if _profile_sink is None:
+            _profile_sink = ProfileSink(supabase)
+    return _profile_sink
+
+
+class ScrapeCheckpoint:
+    """
+    Durable per-run record of processed and failed profile URLs.
+
+    Saved (atomically) after every profile, so a browser crash or failed re-login
+    late in a run only costs the profiles that were not reached yet. Failed URLs
+    are retried on resume until they hit max_attempts.
+    """
+
+    def __init__(self, run_id: str, directory: str = ".cache/checkpoints", max_attempts: int = 3):
+        self.run_id = run_id
+        self.path = os.path.join(directory, f"{run_id}.json")
+        self.max_attempts = max_attempts
+        self.processed = set()
+        self.failed = {}
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                self.processed = set(data.get("processed", []))
+                self.failed = dict(data.get("failed", {}))
+            except Exception as e:
+                logger.warning(f"Could not read checkpoint {self.path}, starting fresh: {e}")
+
+    @staticmethod
+    def run_id_for(username, source) -> str:
+        """
+        Same account + same source -> same checkpoint.
+
+        source is either a label for URLs queried afresh on every run (e.g. the unscraped
+        all_leads rows of some tags, a set that shrinks as profiles get scraped) or the
+        URL list itself for a fixed set such as an uploaded CSV (order does not matter).
+        """
+        digest = hashlib.sha1()
+        digest.update(str(username).encode("utf-8"))
+        if isinstance(source, str):
+            digest.update(b"\nsource:" + source.encode("utf-8"))
+        else:
+            for u in sorted(set(source)):
+                digest.update(b"\n" + u.encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+    def should_skip(self, url: str) -> bool:
+        return url in self.processed or self.failed.get(url, {}).get("attempts", 0) >= self.max_attempts
+
+    def finished(self, urls: Iterable[str]) -> bool:
+        """Every URL is processed or out of attempts, so the checkpoint can be cleared"""
+        return all(self.should_skip(u) for u in urls)
+
+    def mark_processed(self, url: str):
+        self.processed.add(url)
+        self.failed.pop(url, None)
+        self.save()
+
+    def mark_failed(self, url: str, error: str):
+        entry = self.failed.setdefault(url, {"attempts": 0, "error": None})
+        entry["attempts"] += 1
+        entry["error"] = error[:300]
+        self.save()
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"run_id": self.run_id, "processed": sorted(self.processed), "failed": self.failed}, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        self.processed = set()
+        self.failed = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
 def cleanup_driver(driver):
     """Cleanup function for driver"""
     if driver:
@@ -36,56 +170,27 @@ def cleanup_driver(driver):
         except:
             pass
 
-def setup_driver():
+def setup_driver(headless=False):
     """Setup Chrome driver with anti-detection options"""
-    chrome_options = Options()
-    
-    # Anti-detection measures
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    chrome_options.add_experimental_option('useAutomationExtension', False)
-    
-    driver = webdriver.Chrome(options=chrome_options)
-    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-    return driver
-
-def human_like_delay(min_delay=3, max_delay=8, extra_delay=0):
-    """Add random delay to simulate human behavior"""
-    delay = random.uniform(min_delay + extra_delay, max_delay + extra_delay)
-    logger.info(f"Waiting {delay:.2f} seconds...")
-    time.sleep(delay)
-
-def exponential_backoff(attempt):
-    """Exponential backoff for retries"""
-    delay = min(300, (2 ** attempt) + random.uniform(0, 1))
-    logger.info(f"Backoff delay: {delay:.2f} seconds")
-    time.sleep(delay)
-
-def check_rate_limit(session_requests):
-    """Check if we need to take a longer break"""
-    # Remove long break logic
-    # Long break every 10 requests
-    # if session_requests % 10 == 0:
-    #     long_delay = random.uniform(60, 120)
-    #     logger.info(f"Taking extended break: {long_delay:.2f} seconds")
-    #     time.sleep(long_delay)
-    
-    return session_requests + 1
+    return create_driver(headless=headless)
 
-def restart_session(driver):
-    """Restart the browser session"""
-    if driver:
-        driver.quit()
-        time.sleep(random.uniform(5, 15))
-    driver = setup_driver()
-    return driver
+def page_signal(driver):
+    """Why a profile came back empty: a checkpoint/authwall redirect, or just no profile card"""
+    try:
+        current_url = (driver.current_url or "").lower()
+    except Exception:
+        return pacing.ERROR
+    if any(marker in current_url for marker in ("checkpoint", "authwall", "/login", "uas/")):
+        return pacing.CHECKPOINT
+    return pacing.EMPTY
 
 def perform_login(driver, username=None, password=None):
-    """Handle login process"""
+    """Handle login process: the account's stored session first, typed credentials otherwise"""
     wait = WebDriverWait(driver, 10)
-    
+
+    if username and get_session_store().restore(driver, username):
+        return True
+
     # Login page with human-like delay
     driver.get("https://www.linkedin.com/login")
     time.sleep(random.uniform(2, 4))
@@ -93,7 +198,6 @@ def perform_login(driver, username=None, password=None):
     if username and password:
         logged_in = False
 
-        # Only login with credentials, no cookie logic
         logger.info("Logging in with credentials...")
         if "login" not in driver.current_url.lower():
             driver.get("https://www.linkedin.com/login")
@@ -121,233 +225,303 @@ def perform_login(driver, username=None, password=None):
         
         time.sleep(random.uniform(3, 5))
         
-        if "feed" in driver.current_url.lower() or "home" in driver.current_url.lower():
+        # Handle security checkpoint
+        if "checkpoint" in driver.current_url.lower():
+            input("Complete the security check in the browser and press Enter here...")
+            time.sleep(5)
+
+        if is_logged_in(driver):
             logger.info("Login successful!")
             logged_in = True
+            get_session_store().remember(driver, username)
+        else:
+            logger.error(f"Login failed, landed on {driver.current_url}")
     else:
         # Manual login
         print("Please log in to LinkedIn manually...")
         try:
-            WebDriverWait(driver, 300).until(lambda d: "feed" in d.current_url.lower())
+            WebDriverWait(driver, 300).until(is_logged_in)
             print("Login successful! Proceeding with scraping...")
+            logged_in = True
         except:
             print("Login failed or took too long.")
             return False
 
     time.sleep(random.uniform(2, 4))
+    return logged_in
 
-    # Handle security checkpoint
-    if "checkpoint" in driver.current_url.lower():
-        input("Complete the security check in the browser and press Enter here...")
-        time.sleep(5)
-    
-    return True
-
-def scrape_profile(driver, url, wait):
-    """Scrape a single LinkedIn profile"""
-    # ORIGINAL XPaths - UNCHANGED
-    xpath_name = "//h1[contains(@class, 't-24')]"
-    xpath_bio = '//*[@id="profile-content"]/div/div[2]/div/div/main/section[1]/div[2]/div[2]/div[1]/div[2]'
-    xpath_skills = "//section[descendant::div[@id='skills']]/div[3]/ul/li//a[contains(@href, 'SKILL')]"
-    xpath_exp = "(//section[.//*[@id='experience']]//ul[1]/li)[1]"
-    xpath_about = "//section[descendant::div[@id='about']]/div[3]"
-    xpath_company_lkd = "//section[.//*[@id='experience']]//ul[1]//a[@data-field='experience_company_logo']"
-    xpath_title = "(((//section[.//div[@id='experience']]//li)[1]//a)[2]/div)[1]"
-    xpath_company_name = "(//section[.//*[@id='experience']]//ul[1]//a[@data-field='experience_company_logo'])[2]/span[1]/span[@aria-hidden='true']"
-    xpath_location = "//div[*/a[contains(@href,'contact-info')]]/span[1]"
-    
-    details = {
-        'lead_id': None,
-        'name': None,
-        'title': None,
-        'location': None,
-        'profile_url': url,
-        'bio': None,
-        'skills': [],
-        'experience': None,
-        'company_name': None,
-        'company_page_url': None,
-    }
+def open_profile(driver, url, page_load_callback=None):
+    """Load a profile page the way a person would"""
+    started = time.monotonic()
+    driver.get(url)
+    if page_load_callback:
+        page_load_callback(time.monotonic() - started)
+    time.sleep(random.uniform(3, 6))
 
-    try:
-        driver.get(url)
-        time.sleep(random.uniform(3, 6))
+    # Simulate human scrolling; scroll far enough that lazy sections (skills, experience) render
+    driver.execute_script("window.scrollTo(0, 300);")
+    time.sleep(random.uniform(1, 2))
+    driver.execute_script("window.scrollTo(0, 800);")
+    time.sleep(random.uniform(1, 2))
 
-        # Simulate human scrolling
-        driver.execute_script("window.scrollTo(0, 300);")
-        time.sleep(random.uniform(1, 2))
 
-        # Lead_id 
-        try:
-            if '/in/' in url:
-                lead_arr = url.split('/')
-                idx = lead_arr.index('in')
-                lead_id = lead_arr[idx+1]
-                if '?' in lead_id:
-                    lead_id = lead_id.split('?')[0]
-                details['lead_id'] = lead_id
-        except:
-            details['lead_id'] = ''.join(random.choices(string.ascii_letters + string.digits, k=12))
-
-        # Name - ORIGINAL LOGIC PRESERVED
-        name_element = wait.until(EC.presence_of_element_located((By.XPATH, xpath_name)))
-        details['name'] = name_element.text.strip()
-
-        # Bio - ORIGINAL LOGIC PRESERVED
-        try:
-            bio_element = wait.until(EC.presence_of_element_located((By.XPATH, xpath_bio)))
-            details['bio'] = bio_element.text.strip()
-        except:
-            details['bio'] = ""
+def scrape_profile(driver, url, wait, single_pass=True, snapshot_dir=None, page_load_callback=None):
+    """
+    Scrape a single LinkedIn profile (single_pass=False uses the original per-field waits).
+    With snapshot_dir, the page source is also kept there gzipped for re-parsing later.
+    """
+    try:
+        open_profile(driver, url, page_load_callback)
 
-        # Title - ORIGINAL LOGIC PRESERVED
-        try:
-            title_element = wait.until(EC.presence_of_element_located((By.XPATH, xpath_title)))
-            details['title'] = title_element.text.strip()
-        except:
-            details['title'] = ""
+        details = None
+        if single_pass:
+            try:
+                details = extract_profile_single_pass(driver, url, wait)
+            except TimeoutException:
+                # No profile card at all; the per-field path would only wait for it again
+                raise
+            except Exception as e:
+                logger.warning(f"Single-pass extraction failed for {url}, falling back to per-field waits: {e}")
+        if details is None:
+            details = extract_profile_per_field(driver, url, wait)
 
-        # Location - ORIGINAL LOGIC PRESERVED
-        try:
-            location_element = wait.until(EC.presence_of_element_located((By.XPATH, xpath_location)))
-            details['location'] = location_element.text.strip()
-        except:
-            details['location'] = None
+        if snapshot_dir and details['name']:
+            save_snapshot(snapshot_dir, url, driver.page_source)
 
-        # Company Name - ORIGINAL LOGIC PRESERVED
-        try:
-            company_name_element = wait.until(EC.presence_of_element_located((By.XPATH, xpath_company_name)))
-            details['company_name'] = company_name_element.text.strip()
-        except:
-            details['company_name'] = None
+        return details if details['name'] else None
 
-        # About - ORIGINAL LOGIC PRESERVED
-        try:
-            about_element = wait.until(EC.presence_of_element_located((By.XPATH, xpath_about)))
-            details['bio'] += "\n" + about_element.text.strip()
-        except:
-            pass
+    except Exception as e:
+        logger.error(f"Error processing profile {url}: {str(e)}")
+        return None
 
-        # Scroll more for additional content
-        driver.execute_script("window.scrollTo(0, 800);")
-        time.sleep(random.uniform(1, 2))
 
-        # Skills - ORIGINAL LOGIC PRESERVED
-        try:
-            skills_elements = wait.until(EC.presence_of_all_elements_located((By.XPATH, xpath_skills)))
-            details['skills'] = [skill.text.strip() for skill in skills_elements]
-        except:
-            details['skills'] = []
+def snapshot_profile(driver, url, wait, snapshot_dir=SNAPSHOT_DIR, page_load_callback=None):
+    """Load a profile, wait for its card and store the page source; parsing happens elsewhere"""
+    try:
+        open_profile(driver, url, page_load_callback)
+        wait.until(EC.presence_of_element_located((By.XPATH, PROFILE_XPATHS['name'])))
+        return save_snapshot(snapshot_dir, url, driver.page_source)
+    except Exception as e:
+        logger.error(f"Error snapshotting profile {url}: {str(e)}")
+        return None
 
-        # Experience - ORIGINAL LOGIC PRESERVED
-        try:
-            exp_elements = wait.until(EC.presence_of_all_elements_located((By.XPATH, xpath_exp)))
-            details['experience'] = "\n".join([x.text.strip() for x in exp_elements])
-        except:
-            details['experience'] = ""
 
-        # Company LinkedIn page - ORIGINAL LOGIC PRESERVED
-        try:
-            comp_ldk_pages = wait.until(EC.presence_of_all_elements_located((By.XPATH, xpath_company_lkd)))
-            company_links = [comp.get_attribute('href') for comp in comp_ldk_pages if comp.get_attribute('href')]
-            details['company_page_url'] = company_links[0] if company_links else None
-        except:
-            details['company_page_url'] = None
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
 
-        return details if details['name'] else None
 
-    except Exception as e:
-        logger.error(f"Error processing profile {url}: {str(e)}")
-        return None
+def get_parse_pool(rebuild=False):
+    """Process pool shared by all scraper threads for parsing snapshots off the browser thread"""
+    global _parse_pool
+    with _parse_pool_lock:
+        if rebuild and _parse_pool is not None:
+            # A crashed worker leaves the pool unusable for every later submit
+            _parse_pool.shutdown(wait=False, cancel_futures=True)
+            _parse_pool = None
+        if _parse_pool is None:
+            _parse_pool = new_parse_pool(workers=max(1, min(4, (os.cpu_count() or 2) - 1)))
+    return _parse_pool
 
-def get_linkedin_profile_details(urls: List[str], username: str = None, password: str = None, 
+def get_linkedin_profile_details(urls: Iterable[str], username: str = None, password: str = None, 
                                resume_from_checkpoint: bool = True, progress_callback=None, 
-                               status_callback=None) -> List[Dict]:
+                               status_callback=None, profile_callback=None, checkpoint_id: str = None,
+                               single_pass_extraction: bool = True, snapshot_dir: str = None,
+                               parse_offline: bool = False, target_per_hour: float = None,
+                               daily_cap: int = None) -> List[Dict]:
     """
     Streamlit-compatible LinkedIn scraper without signal handlers
     
     Args:
+        urls: List of profile URLs, or any iterable (e.g. a queue drained by the
+              headless pipeline); total counts are only reported for sized inputs
         progress_callback: Function to call with progress updates
         status_callback: Function to call with status updates
+        profile_callback: Function called with each scraped profile as soon as it is scraped
+        resume_from_checkpoint: Skip URLs an earlier run with the same checkpoint already processed
+                                (False starts the checkpoint over)
+        checkpoint_id: Name of the checkpoint (see ScrapeCheckpoint.run_id_for); derived from
+                       username + URL set for lists, no checkpoint for unsized iterables unless given
+        single_pass_extraction: Read all fields in one execute_script call after a single wait
+                                (False uses the original per-field waits)
+        snapshot_dir: Also keep a gzipped page_source snapshot of every profile there
+                      (re-parse them later with reparse_snapshots.py)
+        parse_offline: Only snapshot pages in the browser and parse them with lxml in a
+                       process pool (snapshots go to snapshot_dir or .cache/snapshots)
+        target_per_hour: Profiles per hour this account aims for (default PACING_TARGET_PER_HOUR)
+        daily_cap: Max profile visits per account per day (default PACING_DAILY_CAP)
     """
+    total = len(urls) if hasattr(urls, '__len__') else None
     
     scraped_data = []
     current_index = 0
+
+    checkpoint = None
+    if checkpoint_id or total is not None:
+        checkpoint = ScrapeCheckpoint(checkpoint_id or ScrapeCheckpoint.run_id_for(username, list(urls)))
+        if not resume_from_checkpoint:
+            checkpoint.clear()
+        elif total is not None:
+            # Drop already-processed URLs up front so their pages are never loaded again
+            remaining = [u for u in urls if not checkpoint.should_skip(u)]
+            if len(remaining) < total:
+                logger.info(f"Resuming checkpoint {checkpoint.run_id}: skipping {total - len(remaining)} of {total} URLs")
+                if status_callback:
+                    status_callback(f"⏩ Resuming: {total - len(remaining)} of {total} profiles already processed")
+            urls = remaining
+            total = len(urls)
+            if not urls:
+                return scraped_data
+    total_label = total if total is not None else "?"
+
+    sink = get_profile_sink()
+    parse_pool = get_parse_pool() if parse_offline else None
+    pacer = pacing.get_pacer(username or "manual", target_per_hour, daily_cap)
+    pending_parses = {}
+
+    def record_profile(url, profile_data):
+        scraped_data.append(profile_data)
+        logger.info(f"Successfully scraped: {profile_data['name']}")
+
+        # --- Queue for lead_details insert + all_leads scraped update (written in the background) ---
+        sink.add(profile_data)
+        if profile_callback:
+            profile_callback(profile_data)
+        if checkpoint:
+            checkpoint.mark_processed(url)
+
+    def collect_parses():
+        # Blocks until every submitted parse is in; called while the pacer waits for the next slot anyway
+        for future in concurrent.futures.as_completed(list(pending_parses)):
+            url = pending_parses.pop(future)
+            try:
+                profile_data = future.result()
+            except Exception as e:
+                profile_data = None
+                logger.error(f"Error parsing snapshot of {url}: {str(e)}")
+            if profile_data:
+                record_profile(url, profile_data)
+                continue
+            # The page itself was already reported to the pacer when it was snapshotted
+            if checkpoint:
+                checkpoint.mark_failed(url, "No profile card found in snapshot")
     
-    # Setup driver
-    driver = setup_driver()
+    # Setup driver: a warm, already logged-in browser for this account when the pool has one
+    browser_pool = get_browser_pool()
+    browser = browser_pool.acquire(username or "manual")
+    driver = browser.driver
     wait = WebDriverWait(driver, 10)
-    session_requests = 0
-    max_session_requests = 50
+    keep_browser = True
+
+    def record_page_load(seconds):
+        browser_pool.record_page_load(browser, seconds)
+        # driver.get returns after the load event, so the page's timings are complete here
+        get_page_weight_stats().record("profile", browser.block_profile, measure_page(browser.driver))
+
+    def record_signal(signal):
+        pacer.record(signal)
+        if signal == pacing.CHECKPOINT:
+            # Never hand a challenged session to the next run
+            browser.logged_in = False
+            if username:
+                get_session_store().invalidate(username)
 
     try:
+        # A warm browser's session can have expired or been challenged while it sat idle
+        if browser.logged_in:
+            driver.get("https://www.linkedin.com/feed/")
+            time.sleep(random.uniform(2, 4))
+            if not check_login_status(driver):
+                logger.info(f"Warm browser for {username} is no longer logged in")
+                browser.logged_in = False
+
         # Perform login
-        if status_callback:
-            status_callback("🔑 Logging into LinkedIn...")
-            
-        if not perform_login(driver, username, password):
-            logger.error("Login failed")
+        if browser.logged_in:
+            if status_callback:
+                status_callback("♻️ Reusing a logged-in browser for this account")
+        else:
             if status_callback:
-                status_callback("❌ Login failed")
-            return scraped_data
+                status_callback("🔑 Logging into LinkedIn...")
 
-        if status_callback:
-            status_callback("✅ Login successful! Starting to scrape profiles...")
+            if not perform_login(driver, username, password) or not is_logged_in(driver):
+                logger.error("Login failed")
+                if status_callback:
+                    status_callback("❌ Login failed")
+                keep_browser = False
+                return scraped_data
+            browser_pool.ready(browser)
 
-        # Process URLs starting from current_index
-        for i in range(current_index, len(urls)):
-            url = urls[i]
-            logger.info(f"Processing profile {i+1}/{len(urls)}: {url}")
-            
             if status_callback:
-                status_callback(f"🔍 Processing profile {i+1}/{len(urls)}")
+                status_callback("✅ Login successful! Starting to scrape profiles...")
+
+        # Process URLs in order
+        for i, url in enumerate(urls):
+            if checkpoint and checkpoint.should_skip(url):
+                logger.info(f"Skipping {url}, already processed in checkpoint {checkpoint.run_id}")
+                continue
+            logger.info(f"Processing profile {i+1}/{total_label}: {url}")
             
-            # Rate limiting check
-            session_requests = check_rate_limit(session_requests)
+            if status_callback:
+                status_callback(f"🔍 Processing profile {i+1}/{total_label}")
             
-            # Restart session if needed
-            if session_requests >= max_session_requests:
-                logger.info("Restarting session to avoid detection")
+            # Pacing: waits for this account's next slot (adapts to blocks, errors and the daily cap)
+            if not pacer.wait():
+                logger.warning(f"Daily cap of {pacer.daily_cap} profiles reached for {username}")
+                if status_callback:
+                    status_callback(f"⏸️ Daily cap of {pacer.daily_cap} profiles reached for this account")
+                break
+
+            # Recycle the browser when Chrome's memory or page-load latency says so
+            recycle_reason = browser_pool.recycle_reason(browser)
+            if recycle_reason:
                 if status_callback:
-                    status_callback("🔄 Restarting browser session...")
-                driver = restart_session(driver)
+                    status_callback(f"🔄 Restarting browser session ({recycle_reason})...")
+                browser = browser_pool.recycle(browser, recycle_reason)
+                driver = browser.driver
                 wait = WebDriverWait(driver, 10)
-                session_requests = 0
                 # Re-login after restart
-                if not perform_login(driver, username, password):
+                if not perform_login(driver, username, password) or not is_logged_in(driver):
                     logger.error("Re-login failed after session restart")
                     if status_callback:
                         status_callback("❌ Re-login failed after session restart")
+                    keep_browser = False
                     break
+                browser_pool.ready(browser)
 
             # Scrape profile
             try:
-                profile_data = scrape_profile(driver, url, wait)
-                
-                if profile_data:
-                    scraped_data.append(profile_data)
-                    logger.info(f"Successfully scraped: {profile_data['name']}")
-
-                    # --- Add lead to Supabase lead_details table ---
-                    try:
-                        supabase.table("lead_details").insert(profile_data).execute()
-                        logger.info(f"Inserted lead_id {profile_data['lead_id']} into lead_details")
-                    except Exception as e:
-                        logger.error(f"Error inserting lead_details: {str(e)}")
-
-                    # --- Update scraped column in all_leads table ---
-                    try:
-                        supabase.table("all_leads").update({"scraped": True}).eq("lead_id", profile_data['lead_id']).execute()
-                        logger.info(f"Updated scraped=True for lead_id {profile_data['lead_id']} in all_leads")
-                    except Exception as e:
-                        logger.error(f"Error updating all_leads scraped column: {str(e)}")
+                if parse_offline:
+                    snapshot = snapshot_profile(driver, url, wait, snapshot_dir or SNAPSHOT_DIR, record_page_load)
+                    if snapshot:
+                        pacer.record(pacing.OK)
+                        try:
+                            future = parse_pool.submit(parse_snapshot, snapshot)
+                        except concurrent.futures.process.BrokenProcessPool:
+                            parse_pool = get_parse_pool(rebuild=True)
+                            future = parse_pool.submit(parse_snapshot, snapshot)
+                        pending_parses[future] = url
+                    else:
+                        record_signal(page_signal(driver))
+                        if checkpoint:
+                            checkpoint.mark_failed(url, "No profile card found")
+                else:
+                    profile_data = scrape_profile(driver, url, wait, single_pass=single_pass_extraction,
+                                                  snapshot_dir=snapshot_dir, page_load_callback=record_page_load)
+
+                    if profile_data:
+                        pacer.record(pacing.OK)
+                        record_profile(url, profile_data)
+                    else:
+                        record_signal(page_signal(driver))
+                        if checkpoint:
+                            checkpoint.mark_failed(url, "No profile card found")
                     
             except Exception as e:
                 logger.error(f"Error processing profile {url}: {str(e)}")
+                if checkpoint:
+                    checkpoint.mark_failed(url, str(e))
+                pacer.record(pacing.ERROR)
                 if status_callback:
                     status_callback(f"⚠️ Error processing profile: {str(e)[:100]}...")
-                if i < len(urls) - 1:
-                    exponential_backoff(1)
                 continue
             
             # Update current index
@@ -358,13 +532,20 @@ def get_linkedin_profile_details(urls: List[str], username: str = None, password
                 progress_callback({
                     'scraped_count': len(scraped_data),
                     'current_index': current_index,
-                    'total_urls': len(urls),
-                    'progress_percent': (current_index / len(urls)) * 100
+                    'total_urls': total,
+                    'progress_percent': (current_index / total) * 100 if total else None
                 })
             
-            # Human-like delay between profiles
-            if i < len(urls) - 1:
-                human_like_delay(4, 8, random.uniform(2, 5))
+            # The snapshot is parsed while this account waits for its next slot; the next URL is
+            # only requested once the parse is in, since work queues settle this one on it
+            if pending_parses:
+                pacer.wait_for_slot(while_waiting=collect_parses)
+
+        collect_parses()
+
+        # A fully processed run has nothing left to resume
+        if checkpoint and total is not None and checkpoint.finished(urls):
+            checkpoint.clear()
 
         if status_callback:
             status_callback(f"🎉 Scraping completed! Total profiles: {len(scraped_data)}")
@@ -373,8 +554,12 @@ def get_linkedin_profile_details(urls: List[str], username: str = None, password
 
     except Exception as e:
         logger.error(f"Error in get_linkedin_profile_details: {str(e)}")
+        keep_browser = False
         if status_callback:
             status_callback(f"❌ Error: {str(e)}")
         return scraped_data
     finally:
-        cleanup_driver(driver)
+        # Logged-in, healthy browsers stay warm for this account's next run
+        browser_pool.release(browser, keep=keep_browser)
+        # Make sure this run's profiles reached Supabase (or the write-ahead log) before returning
+        sink.flush()
@@ -0,0 +1,396 @@
+import os
+import time
+import socket
+import sqlite3
+import logging
+import threading
+from collections import deque
+from typing import List, Dict, Optional
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LEASE_SECONDS = 600
+MAX_ATTEMPTS = 3
+
+
+def make_worker_id(username: str = "") -> str:
+    """Lease owner name: unique per process and account, readable in the all_leads table"""
+    return f"{socket.gethostname()}-{os.getpid()}-{username or 'manual'}"
+
+
+class SupabaseLeaseQueue:
+    """
+    Scrape work queue on top of all_leads (see sql/scrape_leases.sql).
+
+    claim() atomically moves up to batch_size unscraped leads to in_progress under
+    a lease owned by the worker. Leases run out after lease_seconds unless renewed
+    by heartbeat(), so leads held by a crashed scraper go back to the pool on their own.
+    """
+
+    def __init__(self, client, lease_seconds: int = LEASE_SECONDS, tags: Optional[List[str]] = None,
+                 max_attempts: int = MAX_ATTEMPTS):
+        self.client = client
+        self.lease_seconds = lease_seconds
+        self.tags = tags or None
+        self.max_attempts = max_attempts
+
+    def claim(self, worker_id: str, batch_size: int) -> List[Dict]:
+        """Lease up to batch_size leads; returns [{"lead_id", "linkedin_url"}]"""
+        response = self.client.rpc("claim_scrape_urls", {
+            "p_worker": worker_id,
+            "p_batch": batch_size,
+            "p_lease_seconds": self.lease_seconds,
+            "p_tags": self.tags,
+            "p_max_attempts": self.max_attempts,
+        }).execute()
+        return response.data or []
+
+    def heartbeat(self, worker_id: str) -> int:
+        """Extend all of this worker's leases; returns how many it still holds"""
+        response = self.client.rpc("heartbeat_scrape_leases", {
+            "p_worker": worker_id, "p_lease_seconds": self.lease_seconds,
+        }).execute()
+        return response.data or 0
+
+    def complete(self, worker_id: str, lead_ids: List[str]) -> int:
+        """Mark leases as done (the profile was scraped)"""
+        return self._finish(worker_id, lead_ids, "done")
+
+    def release(self, worker_id: str, lead_ids: List[str]) -> int:
+        """Hand leases back unfinished so any worker can claim them again"""
+        return self._finish(worker_id, lead_ids, "pending")
+
+    def _finish(self, worker_id: str, lead_ids: List[str], status: str) -> int:
+        if not lead_ids:
+            return 0
+        response = self.client.rpc("finish_scrape_leases", {
+            "p_worker": worker_id, "p_lead_ids": list(lead_ids), "p_status": status,
+        }).execute()
+        return response.data or 0
+
+
+class SQLiteLeaseQueue:
+    """
+    Local stand-in for SupabaseLeaseQueue with the same claim/heartbeat/complete/release
+    semantics, for trying scrapers against a queue without touching Supabase.
+
+    Claims run inside BEGIN IMMEDIATE, which takes SQLite's write lock, so concurrent
+    threads or processes sharing the file never lease the same row.
+    """
+
+    def __init__(self, path: str = ".cache/scrape_queue.sqlite3", lease_seconds: int = LEASE_SECONDS,
+                 tags: Optional[List[str]] = None, max_attempts: int = MAX_ATTEMPTS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.tags = tags or None
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS all_leads ("
+            " lead_id TEXT PRIMARY KEY,"
+            " linkedin_url TEXT,"
+            " tag TEXT,"
+            " scraped INTEGER NOT NULL DEFAULT 0,"
+            " scrape_status TEXT NOT NULL DEFAULT 'pending',"
+            " lease_owner TEXT,"
+            " lease_expires_at REAL,"
+            " scrape_attempts INTEGER NOT NULL DEFAULT 0)"
+        )
+
+    def add_leads(self, leads: List[Dict]):
+        """Insert {"lead_id", "linkedin_url", "tag"} rows, ignoring lead_ids already queued"""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO all_leads (lead_id, linkedin_url, tag) VALUES (?, ?, ?)",
+                [(lead["lead_id"], lead["linkedin_url"], lead.get("tag")) for lead in leads]
+            )
+
+    def claim(self, worker_id: str, batch_size: int) -> List[Dict]:
+        now = time.time()
+        tag_filter = ""
+        params = [now, self.max_attempts]
+        if self.tags:
+            tag_filter = f" AND tag IN ({','.join('?' * len(self.tags))})"
+            params.extend(self.tags)
+        params.append(batch_size)
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT lead_id, linkedin_url FROM all_leads"
+                    " WHERE scraped = 0"
+                    " AND (scrape_status = 'pending' OR (scrape_status = 'in_progress' AND lease_expires_at < ?))"
+                    " AND scrape_attempts < ?" + tag_filter +
+                    " ORDER BY lead_id LIMIT ?", params
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE all_leads SET scrape_status = 'in_progress', lease_owner = ?, lease_expires_at = ?,"
+                    " scrape_attempts = scrape_attempts + 1 WHERE lead_id = ?",
+                    [(worker_id, now + self.lease_seconds, lead_id) for lead_id, _ in rows]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [{"lead_id": lead_id, "linkedin_url": linkedin_url} for lead_id, linkedin_url in rows]
+
+    def heartbeat(self, worker_id: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE all_leads SET lease_expires_at = ? WHERE lease_owner = ? AND scrape_status = 'in_progress'",
+                (time.time() + self.lease_seconds, worker_id)
+            ).rowcount
+
+    def complete(self, worker_id: str, lead_ids: List[str]) -> int:
+        return self._finish(worker_id, lead_ids, "done", scraped=True)
+
+    def release(self, worker_id: str, lead_ids: List[str]) -> int:
+        return self._finish(worker_id, lead_ids, "pending")
+
+    def _finish(self, worker_id: str, lead_ids: List[str], status: str, scraped: bool = False) -> int:
+        # In Supabase, scraped=True is set by the profile writer; here the queue is the only table
+        with self._lock:
+            return sum(self._conn.execute(
+                "UPDATE all_leads SET scrape_status = ?, lease_owner = NULL, lease_expires_at = NULL,"
+                " scraped = MAX(scraped, ?) WHERE lease_owner = ? AND lead_id = ?",
+                (status, int(scraped), worker_id, lead_id)
+            ).rowcount for lead_id in lead_ids)
+
+
+class LeasedUrls:
+    """
+    Iterable of profile URLs claimed from a lease queue, for get_linkedin_profile_details.
+
+    URLs are claimed batch_size at a time, and a background thread renews the leases
+    while the scraper works through them. A URL counts as scraped once mark_scraped()
+    is called for it (wire it to profile_callback); when a batch is used up its scraped
+    leads are completed and the rest released for another attempt. If the process dies,
+    the leases simply expire.
+    """
+
+    def __init__(self, lease_queue, worker_id: str, batch_size: int = 5, max_urls: Optional[int] = None,
+                 heartbeat_interval: Optional[float] = None):
+        self.queue = lease_queue
+        self.worker_id = worker_id
+        self.batch_size = batch_size
+        self.max_urls = max_urls
+        self.heartbeat_interval = heartbeat_interval or max(5.0, lease_queue.lease_seconds / 3)
+        self.claimed = 0
+        self.completed = 0
+        self.released = 0
+        self._batch_ids = {}
+        self._scraped = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def mark_scraped(self, url: str):
+        with self._lock:
+            self._scraped.add(url)
+
+    def on_profile(self, profile: Dict):
+        """profile_callback for get_linkedin_profile_details"""
+        self.mark_scraped(profile.get("profile_url"))
+
+    def _settle_batch(self):
+        with self._lock:
+            done = [lead_id for u, lead_id in self._batch_ids.items() if u in self._scraped]
+            unfinished = [lead_id for u, lead_id in self._batch_ids.items() if u not in self._scraped]
+            self._batch_ids = {}
+            self._scraped = set()
+        try:
+            self.queue.complete(self.worker_id, done)
+            self.queue.release(self.worker_id, unfinished)
+            self.completed += len(done)
+            self.released += len(unfinished)
+        except Exception as e:
+            # Leases still run out on their own; unfinished leads come back after lease_seconds
+            logger.warning(f"Could not settle leases for {self.worker_id}: {e}")
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.heartbeat_interval):
+            try:
+                self.queue.heartbeat(self.worker_id)
+            except Exception as e:
+                logger.warning(f"Lease heartbeat failed for {self.worker_id}: {e}")
+
+    def __iter__(self):
+        self._stop.clear()
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name=f"lease-heartbeat-{self.worker_id}", daemon=True)
+        heartbeat.start()
+        try:
+            while self.max_urls is None or self.claimed < self.max_urls:
+                want = self.batch_size if self.max_urls is None else min(self.batch_size, self.max_urls - self.claimed)
+                batch = self.queue.claim(self.worker_id, want)
+                if not batch:
+                    return
+                self.claimed += len(batch)
+                with self._lock:
+                    self._batch_ids = {row["linkedin_url"]: row["lead_id"] for row in batch}
+                logger.info(f"{self.worker_id} leased {len(batch)} URLs ({self.claimed} so far)")
+                for row in batch:
+                    yield row["linkedin_url"]
+                self._settle_batch()
+        finally:
+            # Runs on exhaustion, on break (e.g. failed re-login) and when the generator is closed
+            self._stop.set()
+            self._settle_batch()
+
+
+class SharedUrlPool:
+    """
+    In-process work-stealing queue of profile URLs shared by several scraper accounts.
+
+    Each account pulls chunk_size URLs at a time through its own worker() iterable, so a
+    fast account simply takes more chunks than a throttled one. When an account stops early
+    (login failure, browser crash) or fails max_consecutive_failures profiles in a row, the
+    URLs it had not finished go back to the pool for the accounts that are still healthy.
+    A URL is requeued at most max_requeues times.
+
+    An optional checkpoint (ScrapeCheckpoint) drops URLs processed by an earlier run up
+    front and records every outcome of this one.
+    """
+
+    def __init__(self, urls: List[str], chunk_size: int = 3, max_consecutive_failures: int = 5,
+                 max_requeues: int = 2, checkpoint=None):
+        self.chunk_size = chunk_size
+        self.max_consecutive_failures = max_consecutive_failures
+        self.max_requeues = max_requeues
+        self.checkpoint = checkpoint
+        urls = list(dict.fromkeys(urls))
+        self.skipped = 0
+        if checkpoint is not None:
+            remaining = [u for u in urls if not checkpoint.should_skip(u)]
+            self.skipped = len(urls) - len(remaining)
+            urls = remaining
+        self.total = len(urls)
+        self.dropped = []
+        self._pending = deque(urls)
+        self._requeues = {}
+        self._in_flight = {}
+        self._streaks = {}
+        self._stats = {}
+        self._cond = threading.Condition()
+
+    def worker(self, name: str) -> "PooledUrls":
+        with self._cond:
+            self._in_flight.setdefault(name, 0)
+            self._streaks.setdefault(name, [])
+            self._stats.setdefault(name, {"account": name, "scraped": 0, "failed": 0, "requeued": 0,
+                                          "seconds": 0.0, "stopped": ""})
+        return PooledUrls(self, name)
+
+    @property
+    def remaining(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def _take(self, name: str, n: int) -> List[str]:
+        """Next chunk for name; waits while the pool is empty but other accounts may still give URLs back"""
+        with self._cond:
+            while not self._pending and sum(self._in_flight.values()) - self._in_flight[name] > 0:
+                self._cond.wait()
+            chunk = [self._pending.popleft() for _ in range(min(n, len(self._pending)))]
+            self._in_flight[name] += len(chunk)
+            return chunk
+
+    def _requeue(self, name: str, urls: List[str]):
+        for u in urls:
+            if self._requeues.get(u, 0) < self.max_requeues:
+                self._requeues[u] = self._requeues.get(u, 0) + 1
+                self._pending.append(u)
+                self._stats[name]["requeued"] += 1
+            else:
+                self.dropped.append(u)
+
+    def _settle(self, name: str, url: str, scraped: bool, error: str = "") -> bool:
+        """Record one attempted URL; returns True when the account should stop pulling work"""
+        with self._cond:
+            self._in_flight[name] -= 1
+            stats = self._stats[name]
+            streak = self._streaks[name]
+            stop = False
+            if scraped:
+                stats["scraped"] += 1
+                streak.clear()
+                if self.checkpoint is not None:
+                    self.checkpoint.mark_processed(url)
+            else:
+                stats["failed"] += 1
+                streak.append(url)
+                if self.checkpoint is not None:
+                    self.checkpoint.mark_failed(url, error or "No profile scraped")
+                if len(streak) >= self.max_consecutive_failures:
+                    # Failing every profile usually means the account, not the profiles, is the problem
+                    stats["failed"] -= len(streak)
+                    stats["stopped"] = f"{len(streak)} failures in a row"
+                    self._requeue(name, streak)
+                    streak.clear()
+                    stop = True
+            self._cond.notify_all()
+            return stop
+
+    def _give_back(self, name: str, urls: List[str], seconds: float):
+        with self._cond:
+            self._in_flight[name] -= len(urls)
+            self._stats[name]["seconds"] += seconds
+            if urls and not self._stats[name]["stopped"]:
+                self._stats[name]["stopped"] = "stopped early"
+            self._requeue(name, urls)
+            self._cond.notify_all()
+
+    def stats(self) -> List[Dict]:
+        """Per-account throughput, ready for st.dataframe"""
+        with self._cond:
+            rows = [dict(s) for s in self._stats.values()]
+        for row in rows:
+            row["seconds"] = round(row["seconds"], 1)
+            row["profiles_per_hour"] = round(row["scraped"] * 3600 / row["seconds"], 1) if row["seconds"] else 0.0
+        return rows
+
+
+class PooledUrls:
+    """One account's view of a SharedUrlPool, for get_linkedin_profile_details"""
+
+    def __init__(self, pool: SharedUrlPool, name: str):
+        self.pool = pool
+        self.name = name
+        self._scraped = set()
+        self._lock = threading.Lock()
+
+    def on_profile(self, profile: Dict):
+        """profile_callback for get_linkedin_profile_details"""
+        with self._lock:
+            self._scraped.add(profile.get("profile_url"))
+
+    def __iter__(self):
+        started = time.monotonic()
+        local = deque()
+        current = None
+        try:
+            while True:
+                if current is not None:
+                    # Asking for the next URL means the previous one was attempted
+                    with self._lock:
+                        scraped = current in self._scraped
+                    url, current = current, None
+                    if self.pool._settle(self.name, url, scraped):
+                        logger.warning(f"{self.name} keeps failing, handing its URLs to the other accounts")
+                        return
+                if not local:
+                    local.extend(self.pool._take(self.name, self.pool.chunk_size))
+                    if not local:
+                        return
+                current = local.popleft()
+                yield current
+        finally:
+            # Runs on exhaustion, on break (e.g. failed re-login) and when the generator is closed
+            unfinished = ([current] if current is not None else []) + list(local)
+            self.pool._give_back(self.name, unfinished, time.monotonic() - started)
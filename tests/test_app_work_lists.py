@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("streamlit.testing.v1")
+import postgrest._sync.request_builder as request_builder
+from streamlit.testing.v1 import AppTest
+
+APP = "../app.py"
+
+
+@pytest.fixture
+def no_supabase(monkeypatch):
+    """Every query returns no rows, and is counted per table"""
+    monkeypatch.setenv("SUPABASE_URL", "https://example.supabase.co")
+    monkeypatch.setenv("SUPABASE_KEY", "test-key")
+    queries = []
+
+    def execute(builder):
+        queries.append(str(builder.request.path))
+        return SimpleNamespace(data=[], count=0)
+
+    monkeypatch.setattr(request_builder.SyncQueryRequestBuilder, "execute", execute)
+    monkeypatch.setattr(request_builder.SyncSelectRequestBuilder, "execute", execute)
+    return queries
+
+
+def work_list_queries(queries):
+    return [path for path in queries if path.rstrip("/").rsplit("/", 1)[-1] in ("all_leads", "lead_details", "llm_response")]
+
+
+def test_work_lists_are_cached_per_session(no_supabase):
+    operator_a = AppTest.from_file(APP, default_timeout=120).run()
+    assert not operator_a.exception
+    first_run = len(work_list_queries(no_supabase))
+    assert first_run > 0
+
+    # A rerun of the same session is served from its cache
+    operator_a.run()
+    assert len(work_list_queries(no_supabase)) == first_run
+
+    # Another operator never gets operator A's cached lists
+    operator_b = AppTest.from_file(APP, default_timeout=120).run()
+    assert not operator_b.exception
+    assert len(work_list_queries(no_supabase)) == 2 * first_run
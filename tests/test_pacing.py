@@ -0,0 +1,40 @@
+import multiprocessing
+
+import pytest
+
+from stages import pacing
+from stages.pacing import AccountPacer
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(pacing.time, "sleep", lambda seconds: None)
+
+
+def test_daily_cap_is_shared_by_pacers_of_the_same_account(tmp_path):
+    # Two pacers stand in for two processes (app and pipeline.py) that each loaded the count once
+    first = AccountPacer("me@example.com", daily_cap=3, state_dir=str(tmp_path))
+    second = AccountPacer("me@example.com", daily_cap=3, state_dir=str(tmp_path))
+
+    granted = [pacer.wait() for pacer in (first, second, first, second, first, second)]
+
+    assert granted.count(True) == 3
+    assert first.visits_today == second.visits_today == 3
+
+
+def take_visits(state_dir, attempts, results):
+    pacer = AccountPacer("me@example.com", target_per_hour=1e6, daily_cap=25, state_dir=state_dir)
+    results.put(sum(pacer.wait() for _ in range(attempts)))
+
+
+def test_daily_cap_holds_across_processes(tmp_path):
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=take_visits, args=(str(tmp_path), 20, results)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    granted = sum(results.get(timeout=30) for _ in workers)
+    for worker in workers:
+        worker.join(timeout=30)
+
+    assert granted == 25
+    assert AccountPacer("me@example.com", state_dir=str(tmp_path)).visits_today == 25
@@ -0,0 +1,127 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from stages import work_queue
+from stages.work_queue import SQLiteLeaseQueue
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(work_queue, "time", SimpleNamespace(time=clock.time))
+    return clock
+
+
+def make_queue(path, leads=10, **kwargs):
+    queue = SQLiteLeaseQueue(path=str(path), **kwargs)
+    queue.add_leads([{"lead_id": f"lead-{i:03d}", "linkedin_url": f"https://www.linkedin.com/in/lead-{i:03d}/",
+                      "tag": "even" if i % 2 == 0 else "odd"} for i in range(leads)])
+    return queue
+
+
+def lead_ids(rows):
+    return [row["lead_id"] for row in rows]
+
+
+def test_claim_leases_pending_leads_in_order(tmp_path, clock):
+    queue = make_queue(tmp_path / "q.sqlite3", leads=5)
+
+    first = queue.claim("worker-a", 3)
+    second = queue.claim("worker-b", 3)
+
+    assert lead_ids(first) == ["lead-000", "lead-001", "lead-002"]
+    assert lead_ids(second) == ["lead-003", "lead-004"]
+    assert first[0]["linkedin_url"] == "https://www.linkedin.com/in/lead-000/"
+    assert queue.claim("worker-c", 3) == []
+
+
+def test_claim_filters_by_tag(tmp_path, clock):
+    queue = make_queue(tmp_path / "q.sqlite3", leads=6, tags=["odd"])
+
+    assert lead_ids(queue.claim("worker-a", 10)) == ["lead-001", "lead-003", "lead-005"]
+
+
+def test_expired_lease_is_claimed_again(tmp_path, clock):
+    queue = make_queue(tmp_path / "q.sqlite3", leads=2, lease_seconds=60)
+    assert lead_ids(queue.claim("crashed", 2)) == ["lead-000", "lead-001"]
+
+    clock.now += 30
+    assert queue.claim("worker-b", 2) == []
+
+    clock.now += 31
+    assert lead_ids(queue.claim("worker-b", 2)) == ["lead-000", "lead-001"]
+
+
+def test_heartbeat_keeps_leases_alive(tmp_path, clock):
+    queue = make_queue(tmp_path / "q.sqlite3", leads=2, lease_seconds=60)
+    queue.claim("worker-a", 2)
+
+    for _ in range(3):
+        clock.now += 45
+        assert queue.heartbeat("worker-a") == 2
+    assert queue.claim("worker-b", 2) == []
+
+    # Without a heartbeat the lease runs out
+    clock.now += 61
+    assert lead_ids(queue.claim("worker-b", 2)) == ["lead-000", "lead-001"]
+    assert queue.heartbeat("worker-a") == 0
+
+
+def test_attempts_are_capped(tmp_path, clock):
+    queue = make_queue(tmp_path / "q.sqlite3", leads=1, lease_seconds=60, max_attempts=2)
+    for _ in range(2):
+        assert lead_ids(queue.claim("worker-a", 1)) == ["lead-000"]
+        clock.now += 61
+
+    assert queue.claim("worker-a", 1) == []
+
+
+def test_complete_and_release(tmp_path, clock):
+    queue = make_queue(tmp_path / "q.sqlite3", leads=3)
+    queue.claim("worker-a", 3)
+
+    assert queue.complete("worker-a", ["lead-000"]) == 1
+    assert queue.release("worker-a", ["lead-001"]) == 1
+    # Only the owner can finish a lease
+    assert queue.complete("worker-b", ["lead-002"]) == 0
+
+    assert lead_ids(queue.claim("worker-b", 3)) == ["lead-001"]
+    assert queue.heartbeat("worker-a") == 1  # lead-002 is still leased to worker-a
+    assert queue.complete("worker-a", ["lead-002"]) == 1
+    assert queue.heartbeat("worker-a") == 0
+
+
+def test_concurrent_claims_never_share_a_lead(tmp_path):
+    path = tmp_path / "q.sqlite3"
+    make_queue(path, leads=200)
+    # One queue (and SQLite connection) per worker, like separate processes sharing the file
+    queues = [SQLiteLeaseQueue(path=str(path)) for _ in range(8)]
+    claimed = [[] for _ in queues]
+    start = threading.Barrier(len(queues))
+
+    def worker(idx):
+        start.wait()
+        while True:
+            rows = queues[idx].claim(f"worker-{idx}", 3)
+            if not rows:
+                return
+            claimed[idx].extend(lead_ids(rows))
+
+    threads = [threading.Thread(target=worker, args=(idx,)) for idx in range(len(queues))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    everything = [lead_id for ids in claimed for lead_id in ids]
+    assert len(everything) == len(set(everything)) == 200